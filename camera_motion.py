@@ -0,0 +1,108 @@
+"""
+Global camera-motion estimation (phase correlation) untuk sumber PTZ / panning
+"""
+
+import time
+import numpy as np
+from config import CAMERA_MOTION_CONFIG
+
+
+def downscale_gray(frame, width):
+    """Grayscale, block-averaged copy of a BGR frame as float32.
+
+    Baris/kolom di-sample dengan stride dulu (step // 2 per blok) lalu dirata-rata
+    per blok 2x2, lebih murah dari resize penuh tapi tanpa aliasing berat.
+    """
+    step = max(1, int(np.ceil(frame.shape[1] / width)))
+    half = max(1, step // 2)
+    sampled = frame[::half, ::half]
+    if sampled.ndim == 3:
+        sampled = sampled.mean(axis=2, dtype=np.float32)
+    factor = step // half
+    h = sampled.shape[0] // factor * factor
+    w = sampled.shape[1] // factor * factor
+    small = sampled[:h, :w].reshape(h // factor, factor, w // factor, factor).mean(axis=(1, 3))
+    return small.astype(np.float32, copy=False), half * factor
+
+
+class CameraMotionEstimator:
+    """Frame-to-frame global translation via phase correlation on a small grayscale frame.
+
+    Shift dalam pixel full-resolution: konten frame sekarang = frame sebelumnya
+    digeser (dx, dy). Zoom / perubahan besar menurunkan `response` sehingga
+    dianggap sebagai camera move.
+    """
+
+    def __init__(self, downscale_width=None, pause_threshold=None, min_response=None, settle_frames=None):
+        self.downscale_width = downscale_width or CAMERA_MOTION_CONFIG['downscale_width']
+        self.pause_threshold = pause_threshold or CAMERA_MOTION_CONFIG['pause_threshold']
+        self.min_response = min_response or CAMERA_MOTION_CONFIG['min_response']
+        self.settle_frames = CAMERA_MOTION_CONFIG['settle_frames'] if settle_frames is None else settle_frames
+        self._previous = None
+        self._window = None
+        self._carry = np.zeros(2)
+        self._settle = 0
+        self.response = 1.0
+        self.moving = False
+        self.last_cost_ms = 0.0
+
+    def reset(self):
+        self._previous = None
+        self._carry[:] = 0
+        self._settle = 0
+        self.moving = False
+
+    def estimate(self, frame):
+        """Integer (dx, dy) camera shift since the previous frame.
+
+        Sisa pecahan pixel dibawa ke frame berikutnya agar pergeseran
+        kumulatif tidak drift karena pembulatan.
+        """
+        start = time.perf_counter()
+        small, step = downscale_gray(frame, self.downscale_width)
+        if self._window is None or self._window.shape != small.shape:
+            self._window = np.outer(np.hanning(small.shape[0]), np.hanning(small.shape[1])).astype(np.float32)
+            self._previous = None
+
+        spectrum = np.fft.rfft2((small - small.mean()) * self._window)
+        shift = np.zeros(2)
+        if self._previous is not None:
+            cross = spectrum * np.conj(self._previous)
+            cross /= np.maximum(np.abs(cross), 1e-9)
+            correlation = np.fft.irfft2(cross, s=small.shape)
+            peak_y, peak_x = np.unravel_index(np.argmax(correlation), correlation.shape)
+            self.response = float(correlation[peak_y, peak_x])
+            h, w = small.shape
+            sub_x = self._subpixel(correlation[peak_y, (peak_x - 1) % w], correlation[peak_y, peak_x],
+                                   correlation[peak_y, (peak_x + 1) % w])
+            sub_y = self._subpixel(correlation[(peak_y - 1) % h, peak_x], correlation[peak_y, peak_x],
+                                   correlation[(peak_y + 1) % h, peak_x])
+            # Peak di paruh kedua = shift negatif (wrap-around FFT)
+            dx = (peak_x + w // 2) % w - w // 2 + sub_x
+            dy = (peak_y + h // 2) % h - h // 2 + sub_y
+            shift = np.array([dx, dy]) * step
+        self._previous = spectrum
+
+        # Low response (zoom, scene cut) atau shift besar = camera sedang bergerak
+        large = self.response < self.min_response or np.hypot(*shift) > self.pause_threshold
+        if large:
+            self._settle = self.settle_frames
+        elif self._settle:
+            self._settle -= 1
+        self.moving = large or self._settle > 0
+
+        if self.response < self.min_response:
+            shift = np.zeros(2)
+        total = shift + self._carry
+        rounded = np.rint(total)
+        self._carry = total - rounded
+        self.last_cost_ms = (time.perf_counter() - start) * 1000
+        return rounded.astype(np.int32)
+
+    @staticmethod
+    def _subpixel(left, center, right):
+        """Sub-pixel peak offset from the larger neighbor (Foroosh et al. sinc fit)"""
+        side, neighbor = (1, right) if right > left else (-1, left)
+        if neighbor <= 0 or center <= 0:
+            return 0.0
+        return side * float(neighbor / (neighbor + center))
@@ -16,7 +16,8 @@ MODEL_CONFIG = {
     'model_path': 'yolo11n.pt',
     'confidence_threshold': 0.05,
     'iou_threshold': 0.5,
-    'detection_confidence': 0.10
+    'detection_confidence': 0.10,
+    'precision': 'fp32'  # 'fp32' atau 'bf16' (CPU, fallback ke fp32 jika tidak didukung)
 }
 
 # Vehicle Classes (COCO dataset)
@@ -43,10 +44,111 @@ DEFAULT_LINE_SETTINGS = {
 
 # Tracking Configuration
 TRACKING_CONFIG = {
+    'backend': 'centroid',             # 'centroid', 'iou_kalman', 'bytetrack', 'botsort'
     'max_distance': 150,
     'path_history_length': 20,
-    'track_timeout': 1.5,
-    'min_detection_size': 50
+    'track_timeout': 1.5,              # Detik, dihitung dari timestamp frame
+    'track_timeout_frames': None,      # Jika di-set, timeout berdasarkan jumlah frame
+    'coast_frames': 5,                 # Frame maksimum path diperpanjang dengan posisi prediksi
+    'min_detection_size': 50,
+    'two_stage_association': True,     # ByteTrack-style: deteksi low-confidence hanya untuk track yang ada
+    'low_confidence_max_distance': 75,
+    'min_iou': 0.2,                    # Gate association untuk backend iou_kalman
+    'class_agnostic_association': True,  # Association hanya geometri; class track dari majority vote
+    'class_change_min_votes': 2.0,     # Vote (jumlah confidence) minimum sebelum track boleh match class lain
+    'spatial_index': False,            # Grid index untuk association pada traffic padat
+    'recently_counted_size': 1024,     # Batas id yang diingat setelah track expire
+    'recently_counted_ttl': 10.0,      # Detik
+    'crossing_event_buffer': 4096,     # Ukuran ring buffer crossing event untuk sink
+    'count_dedup': True,               # Total count sekali per kendaraan walau melewati beberapa line
+    'dedup_window_seconds': 1.0,       # Crossing line / region lain dalam window ini = kendaraan sama
+    'dedup_window_distance': 40,       # Pixel (koordinat global region)
+    'dedup_size': 1024,                # Batas track id dan crossing yang diingat untuk dedup
+    'dedup_ttl': 120.0,                # Detik, track id lebih lama dari ini dilupakan
+    'carry_line_counts': True,         # Count per line tetap saat line di-reload (nama sama)
+    'reid_enabled': False,             # Appearance re-ID untuk track yang hilang karena occlusion
+    'reid_bins': 8,                    # Bin histogram per channel warna
+    'reid_grid': 8,                    # Titik sample per sisi bbox (grid x grid)
+    'reid_max_age': 5.0,               # Detik sejak track hilang
+    'reid_max_distance': 300,          # Pixel dari posisi extrapolasi
+    'reid_min_similarity': 0.85,       # Bhattacharyya coefficient minimum
+    'reid_gallery_size': 256,
+    'kalman_process_noise': 1.0,       # Variance akselerasi (pixel/frame^2)
+    'kalman_measurement_noise': 25.0   # Variance posisi deteksi (pixel^2)
+}
+
+# Camera Motion Compensation (PTZ / panning screen source)
+CAMERA_MOTION_CONFIG = {
+    'enabled': False,
+    'downscale_width': 160,   # Lebar frame grayscale untuk phase correlation
+    'pause_threshold': 40,    # Pixel per frame; di atas ini counting di-pause
+    'min_response': 0.05,     # Peak phase correlation minimum (di bawah = zoom / scene cut)
+    'settle_frames': 5        # Frame tunggu setelah camera berhenti sebelum counting lagi
+}
+
+# Zone Counting Configuration (enter / exit / dwell)
+ZONE_CONFIG = {
+    'raster_scale': 2,   # Label map di-downscale 2x dari resolusi frame
+    'zones': [],         # List dict {'name', 'points': [(x, y), ...]} dalam koordinat frame
+    'od_bucket_seconds': 900,   # OD matrix di-export per bucket 15 menit
+    'od_max_buckets': 96        # Bucket lama yang disimpan (24 jam)
+}
+
+# Lane occupancy dan queue length per lajur (signalized intersection)
+LANE_CONFIG = {
+    'raster_scale': 4,      # Mask lajur di-downscale 4x dari resolusi frame
+    'lanes': [],            # List dict {'name', 'points': [(x, y), ...], 'stop_line': [(x1, y1), (x2, y2)]}
+    'stopped_speed': 2.0,   # Pixel/frame, di bawah ini kendaraan dianggap antri
+    'smoothing': 0.2,       # EMA occupancy dan queue length per frame
+    'sample_interval': 1.0, # Detik antar sample time series
+    'history_size': 3600    # Sample time series yang disimpan
+}
+
+# Speed estimation: kalibrasi homography (4 titik) atau dua garis dengan jarak diketahui
+SPEED_CONFIG = {
+    'homography_points': None,   # List [((x, y) image, (X, Y) meter ground), ...] minimal 4 titik
+    'lines': None,               # Dua garis [[(x1, y1), (x2, y2)], [(x1, y1), (x2, y2)]]
+    'line_distance_m': None,     # Jarak antar dua garis di jalan (meter)
+    'min_duration': 0.5,         # Detik minimum track untuk sample homography
+    'smoothing': 0.3,            # EMA speed per track (mode homography)
+    'bin_kmh': 5,                # Lebar bin histogram speed
+    'max_kmh': 200,
+    'bucket_seconds': 900,       # Distribusi speed per bucket 15 menit
+    'max_buckets': 96
+}
+
+# Trajectory Heatmap Configuration
+HEATMAP_CONFIG = {
+    'enabled': True,
+    'raster_scale': 8,           # Pixel per cell grid heatmap
+    'decay_interval': 60,        # Detik antar decay
+    'decay_factor': 0.9,         # Faktor decay (0.9 per menit = half-life ~6.6 menit)
+    'overlay_alpha': 0.4         # Transparansi overlay di GUI
+}
+
+# Automatic Counting Line Suggestion (dari flow field heatmap)
+LINE_SUGGESTION_CONFIG = {
+    'collect_seconds': 180,      # Lama mengumpulkan trajectory sebelum saran dibuat
+    'max_lines': 2,
+    'min_crossings': 10,         # Minimal track yang melewati potongan corridor
+    'axis_separation': 30,       # Derajat minimal antar arah flow yang berbeda
+    'peak_ratio': 0.3,           # Arah / corridor lain minimal 30% dari yang terpadat
+    'corridor_threshold': 0.15,  # Batas tepi corridor relatif terhadap puncak profil melintang
+    'corridor_gap': 80,          # Celah (pixel) antar lajur yang masih satu corridor
+    'edge_margin': 0.15,         # Bagian ujung corridor yang dihindari
+    'margin': 20                 # Pixel tambahan di kedua ujung garis
+}
+
+# CPU Performance Configuration
+PERFORMANCE_CONFIG = {
+    'inference_threads': None,   # torch intra-op threads (None = default torch)
+    'interop_threads': None,     # torch inter-op threads (None = default torch)
+    'cpu_affinity': {            # List core CPU per stage, contoh: {'capture': [2, 3]}
+        'gui': None,
+        'capture': None,
+        'preview': None
+    },
+    'tuning_file': 'cpu_tuning.json'  # Hasil auto-tune, override nilai di atas
 }
 
 # Color Configuration untuk Bounding Box
@@ -0,0 +1,70 @@
+"""
+Deduplikasi total count antar counting line dan capture region yang overlap
+"""
+
+import threading
+import numpy as np
+from config import TRACKING_CONFIG
+from track_store import RecentlyCounted
+
+
+class CountDeduplicator:
+    """Decides whether a line crossing adds to the totals: once per vehicle across lines and regions.
+
+    Dua struktur dengan ukuran tetap:
+    - RecentlyCounted dengan key (source, track_id): track yang sudah masuk total tidak
+      dihitung lagi di line lain.
+    - Ring crossing terakhir (waktu, posisi global, key source+line): crossing
+      track lain di line / region lain dalam window waktu dan jarak yang sama
+      dianggap kendaraan yang sama (track putus di line overlap, atau region
+      bersebelahan).
+    Crossing di line yang sama pada source yang sama tidak pernah saling
+    dedup, sehingga setup satu line tetap menghitung seperti biasa. Satu
+    instance bisa di-share beberapa VehicleTracker (thread-safe).
+    """
+
+    def __init__(self, window_seconds=None, window_distance=None, max_size=None, ttl=None):
+        self.window_seconds = window_seconds or TRACKING_CONFIG['dedup_window_seconds']
+        self.window_distance = window_distance or TRACKING_CONFIG['dedup_window_distance']
+        self.max_size = max_size or TRACKING_CONFIG['dedup_size']
+        self.ttl = ttl or TRACKING_CONFIG['dedup_ttl']
+        self._tracks = RecentlyCounted(self.max_size, self.ttl)
+        self._times = np.full(self.max_size, -np.inf)
+        self._positions = np.zeros((self.max_size, 2))
+        self._line_keys = np.zeros(self.max_size, dtype=np.int64)
+        self._line_ids = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def is_new(self, source, track_id, line, timestamp, position):
+        """Record a crossing; True if it should be added to the totals"""
+        key = (source, track_id)
+        with self._lock:
+            line_key = self._line_ids.setdefault((source, line), len(self._line_ids))
+            self._tracks.prune(timestamp)
+            # TTL dihitung dari crossing terakhir track ini
+            seen = key in self._tracks
+            self._tracks.add(key, timestamp)
+            if seen:
+                return False
+
+            recent = (np.abs(timestamp - self._times) <= self.window_seconds) & (self._line_keys != line_key)
+            if recent.any():
+                offset = self._positions[recent] - position
+                if np.any(np.hypot(offset[:, 0], offset[:, 1]) <= self.window_distance):
+                    return False
+            slot = self._next % self.max_size
+            self._times[slot] = timestamp
+            self._positions[slot] = position
+            self._line_keys[slot] = line_key
+            self._next += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._tracks.clear()
+            self._times[:] = -np.inf
+            self._next = 0
+
+    def __len__(self):
+        return len(self._tracks)
@@ -0,0 +1,156 @@
+"""
+CPU thread dan affinity tuning untuk inference dan pipeline stages
+
+Usage auto-tune:
+    python cpu_tuning.py path/to/clip.mp4 --threads 1 2 4 8 --frames 150
+"""
+
+import os
+import json
+import time
+import argparse
+from config import PERFORMANCE_CONFIG
+
+# Mask affinity proses saat import, sebelum thread mana pun di-pin; thread baru mewarisi
+# mask thread pembuatnya, jadi stage tanpa core dikembalikan ke mask ini
+ORIGINAL_AFFINITY = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else None
+
+
+def load_tuned_settings():
+    """Load auto-tuned settings from the tuning file (if any)"""
+    tuning_file = PERFORMANCE_CONFIG.get('tuning_file')
+    if not tuning_file or not os.path.exists(tuning_file):
+        return {}
+    try:
+        with open(tuning_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Failed to read tuning file {tuning_file}: {e}")
+        return {}
+
+
+def save_tuned_settings(settings):
+    """Merge settings into the tuning file"""
+    tuned = load_tuned_settings()
+    tuned.update(settings)
+    with open(PERFORMANCE_CONFIG['tuning_file'], 'w') as f:
+        json.dump(tuned, f, indent=2)
+    print(f"✅ Tuned settings written to {PERFORMANCE_CONFIG['tuning_file']}: {settings}")
+
+
+def get_performance_settings():
+    """Get PERFORMANCE_CONFIG with auto-tuned values applied"""
+    settings = dict(PERFORMANCE_CONFIG)
+    settings['cpu_affinity'] = dict(PERFORMANCE_CONFIG['cpu_affinity'])
+    tuned = load_tuned_settings()
+    for key, value in tuned.items():
+        if key == 'cpu_affinity':
+            settings['cpu_affinity'].update(value)
+        else:
+            settings[key] = value
+    return settings
+
+
+def apply_torch_threads(settings=None):
+    """Set torch intra-op / inter-op thread counts (call before loading the model)"""
+    settings = settings or get_performance_settings()
+    try:
+        import torch
+    except ImportError:
+        return
+
+    if settings.get('inference_threads'):
+        torch.set_num_threads(int(settings['inference_threads']))
+    if settings.get('interop_threads'):
+        try:
+            torch.set_num_interop_threads(int(settings['interop_threads']))
+        except RuntimeError as e:
+            # Inter-op pool hanya bisa di-set sekali, sebelum parallel work pertama
+            print(f"⚠️  Could not set inter-op threads: {e}")
+
+    print(f"🧵 Torch threads: intra-op={torch.get_num_threads()}, inter-op={torch.get_num_interop_threads()}")
+
+
+def pin_current_thread(stage, settings=None):
+    """Pin the calling thread to the CPU cores configured for a pipeline stage.
+
+    Stage tanpa core dikembalikan ke mask asli proses, sehingga thread yang
+    dibuat dari thread yang sudah di-pin (mis. GUI) tidak ikut terjepit.
+    """
+    settings = settings or get_performance_settings()
+    cores = settings['cpu_affinity'].get(stage)
+    if not cores:
+        if ORIGINAL_AFFINITY is not None:
+            try:
+                os.sched_setaffinity(0, ORIGINAL_AFFINITY)
+            except OSError as e:
+                print(f"⚠️  Failed to restore CPU affinity for stage '{stage}': {e}")
+        return False
+    if not hasattr(os, 'sched_setaffinity'):
+        print(f"⚠️  CPU affinity not supported on this platform (stage: {stage})")
+        return False
+    try:
+        # pid 0 = calling thread di Linux; thread yang sudah ada (mis. pool torch) tidak ikut berubah,
+        # hanya thread yang dibuat thread ini sesudahnya mewarisi mask ini
+        os.sched_setaffinity(0, set(cores))
+        print(f"📌 Stage '{stage}' pinned to CPU cores {sorted(cores)}")
+        return True
+    except OSError as e:
+        print(f"⚠️  Failed to pin stage '{stage}' to {cores}: {e}")
+        return False
+
+
+def auto_tune(clip_path, thread_counts=None, max_frames=150, warmup_frames=10, tolerance=0.03):
+    """Sweep torch thread counts on a recorded clip and return the best setting.
+
+    Thread counts within `tolerance` of the best FPS are treated as equal and the
+    smallest one wins, leaving cores free for the capture and GUI threads.
+    """
+    import torch
+    from vehicle_detector import VehicleDetector, iter_clip_frames
+
+    frames = list(iter_clip_frames(clip_path, max_frames))
+    if len(frames) <= warmup_frames:
+        raise ValueError(f"Clip {clip_path} has too few frames for tuning ({len(frames)})")
+
+    if not thread_counts:
+        cpu_count = os.cpu_count() or 1
+        thread_counts = sorted({n for n in (1, 2, 4, 6, 8, 12, 16, cpu_count) if n <= cpu_count})
+
+    detector = VehicleDetector()
+    results = {}
+
+    for n in thread_counts:
+        torch.set_num_threads(n)
+        for frame in frames[:warmup_frames]:
+            detector.detect(frame)
+
+        start = time.perf_counter()
+        for frame in frames[warmup_frames:]:
+            detector.detect(frame)
+        elapsed = time.perf_counter() - start
+
+        results[n] = (len(frames) - warmup_frames) / elapsed
+        print(f"  threads={n:>3}: {results[n]:.2f} FPS")
+
+    best_fps = max(results.values())
+    best_threads = min(n for n, fps in results.items() if fps >= best_fps * (1 - tolerance))
+    print(f"🏁 Best: {best_threads} threads ({results[best_threads]:.2f} FPS)")
+    return best_threads, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Auto-tune CPU inference threads on a recorded clip')
+    parser.add_argument('clip', help='Path to a recorded video clip')
+    parser.add_argument('--threads', type=int, nargs='+', help='Thread counts to sweep')
+    parser.add_argument('--frames', type=int, default=150, help='Number of frames to benchmark')
+    parser.add_argument('--dry-run', action='store_true', help='Do not write the result to the tuning file')
+    args = parser.parse_args()
+
+    best_threads, _ = auto_tune(args.clip, args.threads, args.frames)
+    if not args.dry_run:
+        save_tuned_settings({'inference_threads': best_threads})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Ring buffer in-memory untuk crossing event terstruktur
+"""
+
+import threading
+from config import TRACKING_CONFIG
+
+
+class EventRing:
+    """Fixed-size ring of events with monotonically increasing sequence numbers.
+
+    Detection loop hanya melakukan append O(1); sink (database, UI, file)
+    membaca dengan cursor sendiri lewat `read` tanpa pernah menahan writer.
+    Sink yang tertinggal lebih dari `capacity` event kehilangan event tertua
+    dan mendapat jumlah `dropped`.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or TRACKING_CONFIG['crossing_event_buffer']
+        self._events = [None] * self.capacity
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, event):
+        with self._lock:
+            self._events[self._next_seq % self.capacity] = event
+            self._next_seq += 1
+
+    def cursor(self):
+        """Cursor that only sees events appended from now on"""
+        return self._next_seq
+
+    def read(self, cursor, max_events=None):
+        """Events since `cursor` as (events, next_cursor, dropped); never waits for new events"""
+        with self._lock:
+            end = self._next_seq
+            start = max(cursor, end - self.capacity)
+            if max_events is not None:
+                end = min(end, start + max_events)
+            events = [self._events[seq % self.capacity] for seq in range(start, end)]
+        return events, end, start - cursor
+
+    def __len__(self):
+        return min(self._next_seq, self.capacity)
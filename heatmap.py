@@ -0,0 +1,109 @@
+"""
+Trajectory heatmap dan flow field dari segment path semua track
+"""
+
+import numpy as np
+from config import HEATMAP_CONFIG
+
+
+class TrajectoryHeatmap:
+    """Downscaled float32 density grid plus summed unit flow vectors per cell.
+
+    Setiap frame segment terakhir semua track di-sample per cell dan
+    ditambahkan dengan np.add.at; decay periodik membuat trajectory lama
+    memudar. Mean flow direction per cell = arah jumlah vektor satuan.
+    """
+
+    def __init__(self, frame_size, scale=None, decay_interval=None, decay_factor=None):
+        self.scale = scale or HEATMAP_CONFIG['raster_scale']
+        self.frame_size = tuple(frame_size)
+        width, height = frame_size
+        self.shape = (-(-height // self.scale), -(-width // self.scale))
+        self.decay_interval = decay_interval or HEATMAP_CONFIG['decay_interval']
+        self.decay_factor = HEATMAP_CONFIG['decay_factor'] if decay_factor is None else decay_factor
+        self.density = np.zeros(self.shape, dtype=np.float32)
+        self.flow = np.zeros(self.shape + (2,), dtype=np.float32)
+        self._next_decay = None
+        self.started = None
+        self.last_update = None
+
+    def add_segments(self, starts, ends):
+        """Accumulate line segments (pixel coordinates) into the grid"""
+        starts = np.asarray(starts, dtype=np.float32) / self.scale
+        ends = np.asarray(ends, dtype=np.float32) / self.scale
+        delta = ends - starts
+        length = np.hypot(delta[:, 0], delta[:, 1])
+        moving = length > 0
+        starts, delta, length = starts[moving], delta[moving], length[moving]
+        if len(length) == 0:
+            return
+        # Satu sample per cell sepanjang segment (titik awal tidak dihitung, sudah masuk frame sebelumnya)
+        samples = np.ceil(length).astype(np.int64)
+        segment = np.repeat(np.arange(len(samples)), samples)
+        step = np.arange(len(segment)) - np.repeat(np.cumsum(samples) - samples, samples) + 1
+        t = step / samples[segment]
+        points = starts[segment] + t[:, None] * delta[segment]
+        cols, rows = points[:, 0].astype(np.int64), points[:, 1].astype(np.int64)
+        inside = (cols >= 0) & (cols < self.shape[1]) & (rows >= 0) & (rows < self.shape[0])
+        cells = rows[inside] * self.shape[1] + cols[inside]
+        direction = (delta / length[:, None])[segment[inside]]
+        # Scatter-add langsung ke view flat grid (tanpa array sementara seukuran grid)
+        np.add.at(self.density.reshape(-1), cells, 1.0)
+        np.add.at(self.flow.reshape(-1, 2), cells, direction)
+
+    def update(self, store, timestamp, offset=(0, 0)):
+        """Add the newest path segment of every track detected this frame"""
+        if self.started is None:
+            self.started = timestamp
+        self.last_update = timestamp
+        if self._next_decay is None:
+            self._next_decay = timestamp + self.decay_interval
+        elif timestamp >= self._next_decay:
+            self.decay()
+            self._next_decay = timestamp + self.decay_interval
+        slots = store.active_slots()
+        slots = slots[(store.path_len[slots] >= 2) & (store.last_seen[slots] == timestamp)]
+        if len(slots) == 0:
+            return
+        points = store.last_points(slots, 2) - np.asarray(offset, dtype=np.int32)
+        self.add_segments(points[:, 0], points[:, 1])
+
+    def collected_seconds(self):
+        """Seconds of trajectories accumulated since the heatmap started"""
+        return 0.0 if self.started is None else self.last_update - self.started
+
+    def decay(self):
+        self.density *= self.decay_factor
+        self.flow *= self.decay_factor
+
+    def mean_flow(self):
+        """Per-cell mean direction (radians, image coordinates) and coherence 0-1"""
+        angle = np.arctan2(self.flow[..., 1], self.flow[..., 0])
+        coherence = np.hypot(self.flow[..., 0], self.flow[..., 1]) / np.maximum(self.density, 1e-6)
+        return angle, np.minimum(coherence, 1.0)
+
+    def render(self):
+        """Density as an RGB uint8 image (log scale, black-red-yellow-white)"""
+        level = np.log1p(self.density)
+        level = level / max(float(level.max()), 1e-6)
+        rgb = np.clip(np.stack([level * 3, level * 3 - 1, level * 3 - 2], axis=-1), 0, 1)
+        return (rgb * 255).astype(np.uint8)
+
+    def save_npy(self, path):
+        """Density and flow (dx, dy) stacked as an (H, W, 3) float32 array"""
+        np.save(path, np.dstack([self.density, self.flow]))
+
+    def save_png(self, path):
+        """Rendered density as an image file (cv2, BGR channel order)"""
+        import cv2
+
+        if not cv2.imwrite(path, np.ascontiguousarray(self.render()[..., ::-1])):
+            raise OSError(f"Could not write heatmap image {path}")
+
+    def reset(self):
+        self.density[:] = 0
+        self.flow[:] = 0
+        self._next_decay = None
+        self.started = None
+        self.last_update = None
+
@@ -53,6 +53,8 @@ class LineSettingsDialog:
                         value="horizontal").pack(anchor=tk.W)
         ttk.Radiobutton(type_frame, text="Vertical Line", variable=self.line_type_var, 
                         value="vertical").pack(anchor=tk.W)
+        ttk.Radiobutton(type_frame, text="Auto (from traffic flow)", variable=self.line_type_var, 
+                        value="auto").pack(anchor=tk.W)
     
     def _create_appearance_section(self, parent):
         """Create appearance settings section"""
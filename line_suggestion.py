@@ -0,0 +1,146 @@
+"""
+Saran counting line otomatis dari flow field trajectory (lihat heatmap.py)
+"""
+
+import numpy as np
+from config import LINE_SUGGESTION_CONFIG
+
+
+def suggest_counting_lines(heatmap, max_lines=None, min_crossings=None):
+    """Propose counting lines perpendicular to the dominant flows of a TrajectoryHeatmap.
+
+    Arah flow per cell diperlakukan sebagai axis (dua arah jalan yang sama =
+    satu axis); setiap puncak histogram axis menghasilkan corridor terpadat
+    (profil melintang) dan garis ditempatkan di potongan corridor dengan
+    crossing terbanyak, jauh dari ujung tempat track masih muda / hilang.
+    Return list dict {'points', 'angle', 'crossings', 'forward_share'},
+    terurut dari corridor terpadat.
+    """
+    cfg = LINE_SUGGESTION_CONFIG
+    max_lines = max_lines or cfg['max_lines']
+    min_crossings = cfg['min_crossings'] if min_crossings is None else min_crossings
+    scale = heatmap.scale
+
+    flow = heatmap.flow.astype(np.float64)
+    magnitude = np.hypot(flow[..., 0], flow[..., 1])
+    rows, cols = np.nonzero(magnitude > 0)
+    if len(rows) == 0:
+        return []
+    weight = magnitude[rows, cols]
+    vectors = flow[rows, cols]
+    centers = (np.column_stack([cols, rows]) + 0.5) * scale
+    doubled = np.mod(2 * np.arctan2(vectors[:, 1], vectors[:, 0]), 2 * np.pi)
+
+    suggestions = []
+    for axis in _flow_axes(doubled, weight, np.radians(cfg['axis_separation']), cfg['peak_ratio']):
+        # Cell yang arahnya dekat axis ini (jarak sudut dalam ruang sudut ganda)
+        distance = np.abs(np.angle(np.exp(1j * (doubled - axis))))
+        member = distance <= np.radians(cfg['axis_separation'])
+        theta = 0.5 * np.arctan2((weight[member] * np.sin(doubled[member])).sum(),
+                                 (weight[member] * np.cos(doubled[member])).sum())
+        along = np.array([np.cos(theta), np.sin(theta)])
+        normal = np.array([-along[1], along[0]])
+        suggestions += _corridor_lines(centers[member], vectors[member], along, normal, scale, heatmap.frame_size,
+                                       min_crossings)
+
+    suggestions.sort(key=lambda s: -s['crossings'])
+    return suggestions[:max_lines]
+
+
+def _flow_axes(doubled, weight, separation, peak_ratio, bins=72):
+    """Peaks of the weighted doubled-angle histogram (circular, non-maximum suppressed)"""
+    index = (doubled / (2 * np.pi) * bins).astype(np.int64) % bins
+    hist = np.bincount(index, weights=weight, minlength=bins)
+    hist = hist + 0.5 * (np.roll(hist, 1) + np.roll(hist, -1))
+    centers = (np.arange(bins) + 0.5) * 2 * np.pi / bins
+    axes, top = [], hist.max()
+    while hist.max() > 0 and hist.max() >= peak_ratio * top:
+        peak = int(np.argmax(hist))
+        axes.append(centers[peak])
+        # Puncak lain minimal 2 * separation (sudut ganda) dari puncak ini
+        hist[np.abs(np.angle(np.exp(1j * (centers - centers[peak])))) < 2 * separation] = 0
+    return axes
+
+
+def _corridor_lines(centers, vectors, along, normal, scale, frame_size, min_crossings):
+    """One line per dense corridor of a single flow axis"""
+    cfg = LINE_SUGGESTION_CONFIG
+    s = centers @ along
+    c = centers @ normal
+    flux = vectors @ along
+    # Profil melintang: bin selebar satu cell
+    c_bins = np.floor((c - c.min()) / scale).astype(np.int64)
+    profile = np.bincount(c_bins, weights=np.abs(flux))
+    profile = np.convolve(profile, np.ones(3) / 3, mode='same')
+
+    lines, top = [], profile.max()
+    while profile.max() > 0 and profile.max() >= cfg['peak_ratio'] * top:
+        peak = int(np.argmax(profile))
+        # Corridor = bin di atas threshold sekitar puncak; celah sempit (median, dua arah) digabung
+        above = np.nonzero(profile >= cfg['corridor_threshold'] * profile[peak])[0]
+        gap = max(1, int(cfg['corridor_gap'] / scale)) + 1
+        lo = hi = peak
+        for i in above[above < peak][::-1]:
+            if lo - i > gap:
+                break
+            lo = i
+        for i in above[above > peak]:
+            if i - hi > gap:
+                break
+            hi = i
+        profile[lo:hi + 1] = 0
+
+        inside = (c_bins >= lo) & (c_bins <= hi)
+        line = _place_line(s[inside], flux[inside], along, normal, c.min() + lo * scale,
+                           c.min() + (hi + 1) * scale, scale, frame_size)
+        if line is not None and line['crossings'] >= min_crossings:
+            lines.append(line)
+    return lines
+
+
+def _place_line(s, flux, along, normal, c_lo, c_hi, scale, frame_size):
+    """Cross-section of the corridor with the most crossings, away from both ends"""
+    cfg = LINE_SUGGESTION_CONFIG
+    # Jumlah sample flow per slab selebar satu cell ~ jumlah track yang melewati slab
+    s_bins = np.floor((s - s.min()) / scale).astype(np.int64)
+    crossings = np.convolve(np.bincount(s_bins, weights=np.abs(flux)), np.ones(3) / 3, mode='same')
+    forward = np.bincount(s_bins, weights=np.maximum(flux, 0), minlength=len(crossings))
+    margin = int(len(crossings) * cfg['edge_margin'])
+    usable = crossings[margin:len(crossings) - margin]
+    if len(usable) == 0:
+        return None
+    # Dari slab yang hampir maksimal, pilih yang paling dekat tengah corridor
+    candidates = np.nonzero(usable >= 0.95 * usable.max())[0] + margin
+    best = int(candidates[np.argmin(np.abs(candidates - (len(crossings) - 1) / 2))])
+
+    position = s.min() + (best + 0.5) * scale
+    middle = (c_lo + c_hi) / 2
+    center = position * along + middle * normal
+    half = (c_hi - c_lo) / 2 + cfg['margin']
+    points = _clip_segment(center, normal, -half, half, frame_size)
+    if points is None:
+        return None
+    total = float(np.abs(flux[s_bins == best]).sum())
+    return {
+        'points': points,
+        'angle': float(np.degrees(np.arctan2(along[1], along[0]))),
+        'crossings': float(crossings[best]),
+        'forward_share': float(forward[best]) / total if total > 0 else 0.5
+    }
+
+
+def _clip_segment(center, direction, t_lo, t_hi, frame_size):
+    """Clip center + t * direction (t_lo <= t <= t_hi) to the frame, integer endpoints"""
+    bounds = (frame_size[0] - 1, frame_size[1] - 1)
+    for axis in range(2):
+        if abs(direction[axis]) < 1e-9:
+            if not 0 <= center[axis] <= bounds[axis]:
+                return None
+            continue
+        t1 = (0 - center[axis]) / direction[axis]
+        t2 = (bounds[axis] - center[axis]) / direction[axis]
+        t_lo, t_hi = max(t_lo, min(t1, t2)), min(t_hi, max(t1, t2))
+    if t_hi <= t_lo:
+        return None
+    p1, p2 = center + t_lo * direction, center + t_hi * direction
+    return [(int(round(p1[0])), int(round(p1[1]))), (int(round(p2[0])), int(round(p2[1])))]
@@ -5,9 +5,8 @@ Updated: 2025-07-31 17:39:32 UTC by Rasiharunar
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk, ImageGrab
 import threading
 import time
@@ -18,6 +17,8 @@ from config import *
 from database_handler import DatabaseHandler
 from line_settings_dialog import LineSettingsDialog
 from vehicle_tracker import VehicleTracker
+from vehicle_detector import VehicleDetector
+from cpu_tuning import apply_torch_threads, pin_current_thread
 
 class ModernScreenVehicleCounter:
     def __init__(self):
@@ -27,23 +28,32 @@ class ModernScreenVehicleCounter:
         self.root.configure(bg='#1e1e1e')  # Dark theme
         
         # Initialize components first
+        apply_torch_threads()
         self.init_yolo_model()
+        # Hanya thread GUI yang di-pin, setelah model dimuat; thread lain (termasuk thread torch
+        # yang sudah ada) tidak diubah, thread capture memasang mask stage-nya sendiri
+        pin_current_thread('gui')
         self.init_variables()
         
         # Initialize handlers (with graceful database handling)
         self.db_handler = DatabaseHandler()
-        self.vehicle_tracker = VehicleTracker()
+        self.vehicle_tracker = VehicleTracker(model=getattr(self, 'model', None))
         
         # Setup modern GUI (without complex TTK styles)
         self.setup_modern_gui()
         
         # Set up window close protocol
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # Crossing events dibaca dari ring buffer di GUI thread, detection loop tidak menunggu
+        self.event_cursor = self.vehicle_tracker.crossing_events.cursor()
+        self.root.after(500, self.poll_crossing_events)
 
     def init_yolo_model(self):
         """Initialize YOLO model"""
         try:
-            self.model = YOLO(MODEL_CONFIG['model_path'])
+            self.detector = VehicleDetector()
+            self.model = self.detector.model
             print("✅ YOLO model loaded successfully")
         except Exception as e:
             messagebox.showerror("Model Error", f"Failed to load YOLO model: {e}")
@@ -58,13 +68,18 @@ class ModernScreenVehicleCounter:
         self.selecting_region = False
         
         # Line settings
-        self.counting_line = None
+        self.counting_lines = []  # List dict {'name', 'points', 'settings'}
         self.line_drawn = False
         self.drawing_line = False
         self.line_draw_enabled = False
         self.line_start = None
         self.line_settings = DEFAULT_LINE_SETTINGS.copy()
         
+        # Overlay heatmap trajectory (toggle di GUI)
+        self.show_heatmap = False
+        # Saran line otomatis menunggu trajectory cukup terkumpul
+        self.line_suggestion_pending = False
+        
         # Frame processing
         self.current_frame = None
         self.capture_thread = None
@@ -194,6 +209,12 @@ class ModernScreenVehicleCounter:
                                           bd=0, pady=5)
         self.draw_line_button.pack(fill=tk.X, pady=2)
         
+        tk.Button(line_inner, text="🧭 Suggest Lines", 
+                  command=self.suggest_lines,
+                  bg='#0078d4', fg='white',
+                  font=('Arial', 9), relief='flat',
+                  bd=0, pady=5).pack(fill=tk.X, pady=2)
+        
         tk.Button(line_inner, text="🗑️ Clear Line", 
                   command=self.clear_line,
                   bg='#d13438', fg='white',
@@ -217,6 +238,13 @@ class ModernScreenVehicleCounter:
                                       bd=0, pady=5)
         self.start_button.pack(fill=tk.X, pady=2)
         
+        self.heatmap_button = tk.Button(detection_inner, text="🔥 Show Heatmap", 
+                                        command=self.toggle_heatmap,
+                                        bg='#8764b8', fg='white',
+                                        font=('Arial', 9), relief='flat',
+                                        bd=0, pady=5)
+        self.heatmap_button.pack(fill=tk.X, pady=2)
+        
         tk.Button(detection_inner, text="🔄 Reset Counts", 
                   command=self.reset_count,
                   bg='#d13438', fg='white',
@@ -330,6 +358,18 @@ class ModernScreenVehicleCounter:
                                          font=('Arial', 12, 'bold'))
         self.total_down_label.pack(pady=5)
         
+        # Per-line counts
+        self.line_counts_label = tk.Label(total_frame, text="", 
+                                          bg='#363636', fg='#ffffff',
+                                          font=('Arial', 9), justify=tk.LEFT)
+        self.line_counts_label.pack(pady=(0, 5))
+        
+        # Crossing event terakhir (dari ring buffer)
+        self.last_event_label = tk.Label(total_frame, text="",
+                                         bg='#363636', fg='#adb5bd',
+                                         font=('Arial', 9))
+        self.last_event_label.pack(pady=(0, 5))
+        
         # Vehicle type breakdown
         self.create_modern_vehicle_counts(stats_card)
         
@@ -583,6 +623,7 @@ class ModernScreenVehicleCounter:
 
     def preview_loop(self):
         """Preview loop - shows video without detection"""
+        pin_current_thread('preview')
         fps_counter = 0
         fps_start_time = time.time()
         
@@ -593,8 +634,7 @@ class ModernScreenVehicleCounter:
                     time.sleep(0.1)
                     continue
                 
-                if self.counting_line:
-                    self.draw_counting_line(frame)
+                self.draw_counting_lines(frame)
 
                 self.current_frame = frame.copy()
                 self.root.after(0, self.update_display)
@@ -624,47 +664,100 @@ class ModernScreenVehicleCounter:
                 self.create_automatic_line()
 
     def create_automatic_line(self):
-        """Create horizontal or vertical line automatically"""
+        """Create a horizontal, vertical or traffic-suggested line automatically"""
         if not self.capture_region:
             return
             
         region_width = self.capture_region[2] - self.capture_region[0]
         region_height = self.capture_region[3] - self.capture_region[1]
         
+        if self.line_settings['line_type'] == 'auto':
+            self.suggest_lines()
+            return
         if self.line_settings['line_type'] == 'horizontal':
             y = region_height // 2
-            self.counting_line = [(0, y), (region_width, y)]
+            points = [(0, y), (region_width, y)]
         elif self.line_settings['line_type'] == 'vertical':
             x = region_width // 2
-            self.counting_line = [(x, 0), (x, region_height)]
+            points = [(x, 0), (x, region_height)]
+        else:
+            return
             
+        # Auto line menggantikan semua line yang ada
+        self.counting_lines = []
+        self.add_counting_line(points)
         self.line_drawn = True
         self.line_status.config(text="📏 Line: Auto-generated")
         self.instructions.config(text="✅ Line created automatically. Ready to start detection!")
 
+    def suggest_lines(self):
+        """Replace the counting lines with lines suggested from the collected trajectories"""
+        self.line_suggestion_pending = False
+        heatmap = self.vehicle_tracker.heatmap
+        if not self.is_capturing or heatmap is None:
+            # Start Detection berikutnya jalan collect-only jika belum ada line
+            self.line_settings['line_type'] = 'auto'
+            messagebox.showinfo("🧭 Suggest Lines", "Start detection to collect trajectories (no line needed): "
+                                f"lines are suggested after {LINE_SUGGESTION_CONFIG['collect_seconds'] // 60} "
+                                "minute(s) of traffic.")
+            return
+        remaining = LINE_SUGGESTION_CONFIG['collect_seconds'] - heatmap.collected_seconds()
+        if remaining > 0:
+            # Coba lagi otomatis setelah trajectory cukup terkumpul
+            self.line_suggestion_pending = True
+            self.instructions.config(text=f"🧭 Collecting trajectories, lines suggested in {remaining:.0f}s...")
+            self.root.after(int(remaining * 1000) + 500, lambda: self.suggest_lines()
+                            if self.line_suggestion_pending and self.is_capturing else None)
+            return
+
+        suggestions = self.vehicle_tracker.suggest_counting_lines()
+        if not suggestions:
+            self.instructions.config(text="🧭 Not enough traffic flow for a line suggestion yet. Try again later.")
+            return
+        lines = []
+        for i, suggestion in enumerate(suggestions, start=1):
+            name = f"AUTO {i}"
+            lines.append({'name': name, 'points': suggestion['points'],
+                          'settings': dict(self.line_settings, label_text=name)})
+        # Line saran menggantikan semua line yang ada
+        self.set_counting_lines(lines)
+        self.line_drawn = True
+        self.line_status.config(text=f"📏 Line: {len(lines)} suggested")
+        self.instructions.config(text="✅ " + ", ".join(
+            f"{line['name']}: ~{s['crossings']:.0f} tracks, flow {s['angle']:.0f}°"
+            for line, s in zip(lines, suggestions)))
+
+    def add_counting_line(self, points):
+        """Add a named counting line with a copy of the current line settings"""
+        self.line_suggestion_pending = False
+        name = f"LINE {len(self.counting_lines) + 1}"
+        settings = dict(self.line_settings, label_text=name)
+        self.set_counting_lines(self.counting_lines + [{'name': name, 'points': points, 'settings': settings}])
+
+    def set_counting_lines(self, lines):
+        """Replace the line list (new list, never mutated) and publish it to the running tracker"""
+        self.counting_lines = lines
+        self.vehicle_tracker.set_counting_lines(lines, carry_counts=TRACKING_CONFIG['carry_line_counts'])
+
     def enable_line_drawing(self):
-        """Enable manual line drawing mode for single line"""
+        """Enable manual line drawing mode (each drawn line is added)"""
         if not self.capture_region:
             messagebox.showwarning("⚠️ Warning", "Please select a capture region first")
             return
-        if self.is_capturing:
-            messagebox.showwarning("⚠️ Warning", "Stop detection before drawing a new line")
-            return
-        
         self.line_draw_enabled = True
         self.line_settings['line_type'] = 'manual'
         self.draw_line_button.config(text="✏️ Drawing Enabled", state='disabled')
-        self.instructions.config(text="✏️ LINE DRAWING ENABLED: Click and drag on the video to create ONE counting line.")
+        self.instructions.config(text="✏️ LINE DRAWING ENABLED: Click and drag on the video to add a counting line.")
 
     def clear_line(self):
-        """Clear the counting line"""
-        if messagebox.askyesno("🗑️ Clear Line", "Are you sure you want to clear the counting line?"):
-            self.counting_line = None
+        """Clear all counting lines"""
+        if messagebox.askyesno("🗑️ Clear Lines", "Are you sure you want to clear all counting lines?"):
+            # Detection tetap berjalan; counting berhenti sampai line baru digambar
+            self.line_suggestion_pending = False
+            self.set_counting_lines([])
             self.line_drawn = False
             self.line_status.config(text="📏 Line: Not drawn")
-            self.instructions.config(text="🚫 Counting line cleared. Draw a new line for directional detection.")
-            if self.is_capturing:
-                self.toggle_capture()
+            self.instructions.config(text="🚫 Counting lines cleared. Draw a new line for directional detection.")
 
     def toggle_capture(self):
         """Start or stop vehicle detection"""
@@ -672,8 +765,11 @@ class ModernScreenVehicleCounter:
             messagebox.showwarning("⚠️ Warning", "Please select a capture region first")
             return
 
+        # Line 'auto' tanpa line: detection jalan collect-only sampai line saran siap
+        collect_only = False
         if not self.is_capturing:
-            if not self.line_drawn or not self.counting_line:
+            collect_only = self.line_settings['line_type'] == 'auto' and not self.counting_lines
+            if not collect_only and (not self.line_drawn or not self.counting_lines):
                 messagebox.showwarning("⚠️ Warning", "Please draw a counting line first")
                 return
 
@@ -690,18 +786,40 @@ class ModernScreenVehicleCounter:
             self.draw_line_button.config(text="✏️ Draw Line", state='normal')
 
             self.video_title.config(text="🎥 AI Detection Active - Real-time Counting")
+            # Zone polygon di-rasterize sekali untuk ukuran region
+            region_size = (self.capture_region[2] - self.capture_region[0],
+                           self.capture_region[3] - self.capture_region[1])
+            self.vehicle_tracker.set_zones(ZONE_CONFIG['zones'], region_size)
+            self.vehicle_tracker.set_lanes(LANE_CONFIG['lanes'], region_size)
+            # Heatmap tetap terakumulasi antar start / stop selama region sama
+            heatmap = self.vehicle_tracker.heatmap
+            if heatmap is None or heatmap.frame_size != region_size:
+                self.vehicle_tracker.set_heatmap(region_size)
+
             self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
             self.capture_thread.start()
+            if collect_only:
+                self.suggest_lines()
         else:
             self.video_title.config(text="🎥 Detection Stopped")
             if self.capture_region:
                 self.root.after(500, lambda: self.toggle_preview() if not self.is_previewing else None)
 
+    def toggle_heatmap(self):
+        """Show or hide the trajectory heatmap overlay"""
+        self.show_heatmap = not self.show_heatmap
+        self.heatmap_button.config(text="🔥 Hide Heatmap" if self.show_heatmap else "🔥 Show Heatmap")
+
     def reset_count(self):
         """Reset all vehicle counts"""
         if messagebox.askyesno("🔄 Reset Counts", "Are you sure you want to reset all vehicle counts?"):
+            # Reset di-apply capture thread di awal frame berikutnya (label di-refresh dari sana)
             self.vehicle_tracker.reset_counts()
-            self.update_count_labels()
+            if not self.is_capturing:
+                if self.capture_thread is not None:
+                    self.capture_thread.join(timeout=1.0)
+                self.vehicle_tracker.apply_geometry()
+                self.update_count_labels()
             print("✅ All directional counts reset.")
 
     def capture_screen(self):
@@ -717,8 +835,10 @@ class ModernScreenVehicleCounter:
 
     def capture_loop(self):
         """Improved capture loop with better detection handling"""
+        pin_current_thread('capture')
         fps_counter = 0
         fps_start_time = time.time()
+        resets_applied = self.vehicle_tracker.resets_applied
         
         print("🚀 Starting capture loop...")
         while self.is_capturing:
@@ -728,40 +848,37 @@ class ModernScreenVehicleCounter:
                     time.sleep(0.1)
                     continue
                 
-                # YOLO detection
-                results = self.model(frame, verbose=False, 
-                                   conf=MODEL_CONFIG['confidence_threshold'], 
-                                   iou=MODEL_CONFIG['iou_threshold'])
-                
-                # Process detections
-                detections = []
-                for r in results:
-                    boxes = r.boxes
-                    if boxes is not None:
-                        for box in boxes:
-                            cls = int(box.cls[0])
-                            conf = float(box.conf[0])
-                            if cls in VEHICLE_CLASSES and conf > MODEL_CONFIG['detection_confidence']:
-                                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                                
-                                width = x2 - x1
-                                height = y2 - y1
-                                if width > TRACKING_CONFIG['min_detection_size'] and height > TRACKING_CONFIG['min_detection_size']:
-                                    detections.append({
-                                        'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                                        'class': cls,
-                                        'confidence': conf
-                                    })
+                # YOLO detection (backend ultralytics menjalankan detection sendiri)
+                backend = self.vehicle_tracker.backend
+                if backend.runs_detection:
+                    detections = None
+                else:
+                    detections = self.detector.detect(frame, self.vehicle_tracker.min_confidence)
                 
                 # Update tracking
-                self.vehicle_tracker.update_tracking(detections)
+                self.vehicle_tracker.update_tracking(detections, frame=frame)
+                if self.vehicle_tracker.resets_applied != resets_applied:
+                    resets_applied = self.vehicle_tracker.resets_applied
+                    self.update_count_labels()
+                if backend.runs_detection:
+                    detections = backend.last_detections
                 
                 # Draw visualizations dengan warna berbeda
                 self.draw_detections_with_colors(frame)
-                self.draw_counting_line(frame)
+                self.draw_counting_lines(frame, compensate=True)
+                self.vehicle_tracker.check_zones()
+                self.vehicle_tracker.check_speeds()
+                self.vehicle_tracker.check_lanes()
+                self.vehicle_tracker.check_heatmap()
+                self.draw_heatmap(frame)
+                self.draw_zones(frame)
+                self.draw_lanes(frame)
+                if self.vehicle_tracker.camera_moving:
+                    cv2.putText(frame, "CAMERA MOVING - COUNTING PAUSED", (10, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
                 
                 # Check line crossings with direction
-                if self.vehicle_tracker.check_line_crossings_directional(self.counting_line, self.line_settings):
+                if self.vehicle_tracker.check_line_crossings():
                     self.update_count_labels()
 
                 self.current_frame = frame.copy()
@@ -809,6 +926,9 @@ class ModernScreenVehicleCounter:
             
             # Draw label dengan status
             label = f"{label_prefix} {cls_name} {conf:.2f}"
+            speed = self.vehicle_tracker.track_speed(track_id)
+            if speed is not None:
+                label += f" {speed:.0f} km/h"
             label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
             
             # Background untuk label
@@ -826,22 +946,65 @@ class ModernScreenVehicleCounter:
             # Draw tracking path dengan warna yang sesuai
             path = track['path']
             if len(path) > 1:
-                for i in range(1, len(path)):
-                    cv2.line(frame, path[i-1], path[i], path_color, 2)
+                cv2.polylines(frame, [path], False, path_color, 2)
+
+    def draw_heatmap(self, frame):
+        """Blend the trajectory heatmap over the frame"""
+        heatmap = self.vehicle_tracker.heatmap
+        if not self.show_heatmap or heatmap is None:
+            return
+        overlay = cv2.resize(heatmap.render(), (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_LINEAR)
+        alpha = HEATMAP_CONFIG['overlay_alpha']
+        cv2.addWeighted(cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR), alpha, frame, 1 - alpha, 0, dst=frame)
 
-    def draw_counting_line(self, frame):
-        """Draw the single counting line on the frame"""
-        if self.counting_line:
-            hex_color = self.line_settings['line_color'].lstrip('#')
+    def draw_zones(self, frame):
+        """Draw zone polygons with their current occupancy"""
+        if self.vehicle_tracker.zones is None:
+            return
+        zone_counts = self.vehicle_tracker.zones.get_counts()
+        for zone in ZONE_CONFIG['zones']:
+            points = np.array(zone['points'], dtype=np.int32)
+            cv2.polylines(frame, [points], True, (0, 255, 255), 2)
+            counts = zone_counts[zone['name']]
+            x, y = points.min(axis=0)
+            cv2.putText(frame, f"{zone['name']}: {counts['occupancy']} (in {counts['entered']})", (x, y - 8),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+
+    def draw_lanes(self, frame):
+        """Draw lane polygons with their smoothed queue length and occupancy"""
+        if self.vehicle_tracker.lanes is None:
+            return
+        lane_state = self.vehicle_tracker.lanes.get_state()
+        for lane in LANE_CONFIG['lanes']:
+            points = np.array(lane['points'], dtype=np.int32)
+            cv2.polylines(frame, [points], True, (255, 191, 0), 1)
+            state = lane_state[lane['name']]
+            x, y = (int(v) for v in lane['stop_line'][0])
+            cv2.putText(frame, f"{lane['name']}: Q {state['queue_length']:.0f}{state['unit']} "
+                               f"{state['occupancy'] * 100:.0f}%", (x, y + 16),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 191, 0), 1)
+
+    def draw_counting_lines(self, frame, compensate=False):
+        """Draw all counting lines (optionally camera-compensated)"""
+        for line in self.counting_lines:
+            points = line['points']
+            if compensate:
+                points = self.vehicle_tracker.compensated_line(points, line['name'])
+            self.draw_counting_line(frame, points, line['settings'])
+
+    def draw_counting_line(self, frame, counting_line, line_settings):
+        """Draw one counting line with its own settings"""
+        if counting_line:
+            hex_color = line_settings['line_color'].lstrip('#')
             rgb_color = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
             bgr_color = (rgb_color[2], rgb_color[1], rgb_color[0])
-            thickness = self.line_settings['line_thickness']
+            thickness = line_settings['line_thickness']
             
-            p1, p2 = self.counting_line
+            p1, p2 = counting_line
             cv2.line(frame, p1, p2, bgr_color, thickness)
             
-            if self.line_settings['show_label']:
-                label_text = self.line_settings['label_text']
+            if line_settings['show_label']:
+                label_text = line_settings['label_text']
                 mid_x = (p1[0] + p2[0]) // 2
                 mid_y = (p1[1] + p2[1]) // 2
                 cv2.putText(frame, label_text, (mid_x + 10, mid_y - 10), 
@@ -870,7 +1033,7 @@ class ModernScreenVehicleCounter:
                                     tags="temp_line")
 
     def end_line(self, event):
-        """End line drawing and set the single counting line"""
+        """End line drawing and add it as a new counting line"""
         if self.drawing_line and hasattr(self, 'line_start_canvas'):
             self.drawing_line = False
             self.canvas.delete("temp_line")
@@ -914,11 +1077,11 @@ class ModernScreenVehicleCounter:
             p2 = canvas_to_frame(*p2_canvas)
 
             if math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2) > 10:
-                self.counting_line = [p1, p2]
+                self.add_counting_line([p1, p2])
                 self.line_drawn = True
                 self.line_draw_enabled = False
                 self.draw_line_button.config(text="✏️ Draw Line", state='normal')
-                self.line_status.config(text="📏 Line: 1 drawn")
+                self.line_status.config(text=f"📏 Lines: {len(self.counting_lines)} drawn")
                 self.instructions.config(text="✅ Counting line ready! Start detection to count vehicles.")
             else:
                 messagebox.showwarning("⚠️ Warning", "Line too short. Please draw a longer line.")
@@ -977,8 +1140,35 @@ class ModernScreenVehicleCounter:
         messagebox.showinfo("📊 Reports", "Reports viewer will be implemented in next update!")
 
     def export_data(self):
-        """Export data to CSV/Excel"""
-        messagebox.showinfo("📤 Export", "Data export feature will be implemented in next update!")
+        """Export OD matrix, speed distribution and trajectory heatmap"""
+        od_matrix = self.vehicle_tracker.od_matrix
+        speed_estimator = self.vehicle_tracker.speed_estimator
+        heatmap = self.vehicle_tracker.heatmap
+        if od_matrix is None and speed_estimator is None and heatmap is None:
+            messagebox.showinfo("📤 Export", "Nothing to export: configure ZONE_CONFIG['zones'] or SPEED_CONFIG")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            exported = []
+            if od_matrix is not None:
+                buckets = od_matrix.export_json(path, self.vehicle_tracker.get_counts())
+                exported.append(f"OD: {buckets} bucket(s) to {path}")
+            if speed_estimator is not None:
+                # Distribusi speed disimpan di file terpisah dengan suffix _speed
+                speed_path = path[:-5] + "_speed.json" if path.endswith(".json") else path + "_speed.json"
+                buckets = speed_estimator.stats.export_json(speed_path)
+                exported.append(f"Speed: {buckets} bucket(s) to {speed_path}")
+            if heatmap is not None:
+                # Heatmap sebagai PNG (visual) dan NPY (density + flow dx, dy)
+                base = path[:-5] if path.endswith(".json") else path
+                heatmap.save_png(base + "_heatmap.png")
+                heatmap.save_npy(base + "_heatmap.npy")
+                exported.append(f"Heatmap: {base}_heatmap.png / .npy")
+            messagebox.showinfo("📤 Export", "\n".join(exported))
+        except OSError as e:
+            messagebox.showerror("📤 Export Error", f"Failed to export data: {e}")
 
     def update_count_labels(self):
         """Update count labels with modern styling"""
@@ -987,6 +1177,13 @@ class ModernScreenVehicleCounter:
         self.root.after(0, lambda: self.total_up_label.config(text=f"📈 Total UP: {counts['total_up']}"))
         self.root.after(0, lambda: self.total_down_label.config(text=f"📉 Total DOWN: {counts['total_down']}"))
         
+        # Per-line counts
+        line_text = "\n".join(f"{name}: ↑{c['total_up']} ↓{c['total_down']}" for name, c in counts['lines'].items())
+        if counts['duplicates']:
+            # Kendaraan yang sudah dihitung di line lain tidak masuk total
+            line_text += f"\n🔁 {counts['duplicates']} duplicate(s) not in total"
+        self.root.after(0, lambda: self.line_counts_label.config(text=line_text))
+        
         # Update individual vehicle counts
         vehicles = ['car', 'motorcycle', 'bus', 'truck']
         for vehicle in vehicles:
@@ -999,6 +1196,20 @@ class ModernScreenVehicleCounter:
             self.root.after(0, lambda ul=up_label, uc=up_count: ul.config(text=f"↑{uc}"))
             self.root.after(0, lambda dl=down_label, dc=down_count: dl.config(text=f"↓{dc}"))
 
+    def poll_crossing_events(self):
+        """Show the latest crossing event; runs on the GUI thread every 500 ms"""
+        events, self.event_cursor, dropped = self.vehicle_tracker.crossing_events.read(self.event_cursor)
+        if dropped:
+            print(f"⚠️  {dropped} crossing events dropped (GUI sink too slow)")
+        if events:
+            event = events[-1]
+            # Capture live memakai wall-clock, tampilkan jam dengan milidetik
+            crossing_time = event['crossing_time']
+            clock = time.strftime('%H:%M:%S', time.localtime(crossing_time)) + f".{int(crossing_time * 1000) % 1000:03d}"
+            self.last_event_label.config(
+                text=f"🕒 #{event['track_id']} {event['class']} {event['direction']} at {event['line']} {clock}")
+        self.root.after(500, self.poll_crossing_events)
+
     def on_closing(self):
         """Handle application closing with modern cleanup"""
         if self.is_capturing:
@@ -0,0 +1,94 @@
+"""
+Constant-velocity Kalman filter untuk semua track sekaligus (batched numpy)
+"""
+
+import numpy as np
+from config import TRACKING_CONFIG
+
+
+class KalmanMotionModel:
+    """Batched constant-velocity Kalman filter indexed by track store slot.
+
+    State per slot: [x, y, vx, vy], velocity dalam pixel per frame.
+    """
+
+    def __init__(self, capacity=64, process_noise=None, measurement_noise=None):
+        self.process_noise = process_noise or TRACKING_CONFIG['kalman_process_noise']
+        self.measurement_noise = measurement_noise or TRACKING_CONFIG['kalman_measurement_noise']
+        self.initial_velocity_variance = TRACKING_CONFIG['max_distance'] ** 2
+        self.capacity = 0
+        self.state = np.zeros((0, 4), dtype=np.float64)
+        self.covariance = np.zeros((0, 4, 4), dtype=np.float64)
+        self.ensure_capacity(capacity)
+
+    def ensure_capacity(self, capacity):
+        """Grow the state arrays to match the track store capacity"""
+        if capacity <= self.capacity:
+            return
+        state = np.zeros((capacity, 4), dtype=np.float64)
+        covariance = np.zeros((capacity, 4, 4), dtype=np.float64)
+        state[:self.capacity] = self.state
+        covariance[:self.capacity] = self.covariance
+        self.state = state
+        self.covariance = covariance
+        self.capacity = capacity
+
+    @staticmethod
+    def _transition(dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        return F
+
+    def _process_covariance(self, dt):
+        q = self.process_noise
+        Q = np.zeros((4, 4))
+        Q[0, 0] = Q[1, 1] = dt ** 4 / 4
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = dt ** 3 / 2
+        Q[2, 2] = Q[3, 3] = dt ** 2
+        return Q * q
+
+    def initiate(self, slots, positions):
+        """Start new tracks at the given positions with zero velocity"""
+        slots = np.asarray(slots)
+        self.state[slots, :2] = positions
+        self.state[slots, 2:] = 0
+        self.covariance[slots] = np.diag([
+            self.measurement_noise, self.measurement_noise,
+            self.initial_velocity_variance, self.initial_velocity_variance
+        ])
+
+    def predict(self, slots, dt=1.0):
+        """Advance the given slots by dt and return their predicted positions"""
+        if len(slots) == 0:
+            return np.zeros((0, 2), dtype=np.float64)
+        F = self._transition(dt)
+        self.state[slots] = self.state[slots] @ F.T
+        self.covariance[slots] = F @ self.covariance[slots] @ F.T + self._process_covariance(dt)
+        return self.state[slots, :2].copy()
+
+    def update(self, slots, positions):
+        """Correct the given slots with measured positions"""
+        if len(slots) == 0:
+            return
+        x = self.state[slots]
+        P = self.covariance[slots]
+
+        # Innovation covariance S = H P H^T + R, invers 2x2 secara closed-form
+        S = P[:, :2, :2] + np.eye(2) * self.measurement_noise
+        det = S[:, 0, 0] * S[:, 1, 1] - S[:, 0, 1] * S[:, 1, 0]
+        S_inv = np.empty_like(S)
+        S_inv[:, 0, 0] = S[:, 1, 1] / det
+        S_inv[:, 1, 1] = S[:, 0, 0] / det
+        S_inv[:, 0, 1] = -S[:, 0, 1] / det
+        S_inv[:, 1, 0] = -S[:, 1, 0] / det
+
+        K = P[:, :, :2] @ S_inv
+        innovation = np.asarray(positions, dtype=np.float64) - x[:, :2]
+        self.state[slots] = x + (K @ innovation[:, :, None])[:, :, 0]
+        self.covariance[slots] = P - K @ P[:, :2, :]
+
+    def positions(self, slots):
+        return self.state[slots, :2]
+
+    def velocities(self, slots):
+        return self.state[slots, 2:]
@@ -0,0 +1,103 @@
+"""
+Origin-destination matrix per class dari zone pertama / terakhir setiap track
+"""
+
+import numpy as np
+from config import ZONE_CONFIG, CLASS_NAMES
+from track_store import VOTE_CLASSES, TimeBuckets
+
+
+class ODMatrix(TimeBuckets):
+    """Running OD matrix (class x origin zone x destination zone) per time bucket.
+
+    Satu track selesai = satu increment numpy (O(1)); bucket yang sudah lewat
+    disimpan bersama delta directional count pada bucket yang sama.
+    """
+
+    def __init__(self, zone_names, bucket_seconds=None, max_buckets=None):
+        super().__init__(bucket_seconds or ZONE_CONFIG['od_bucket_seconds'],
+                         max_buckets or ZONE_CONFIG['od_max_buckets'])
+        self.zone_names = list(zone_names)
+        self.matrix = np.zeros((len(VOTE_CLASSES), len(self.zone_names), len(self.zone_names)), dtype=np.int64)
+        self.total = np.zeros_like(self.matrix)
+        # Track yang hanya masuk satu zone, per class (bucket sekarang / total)
+        self.incomplete = np.zeros(len(VOTE_CLASSES), dtype=np.int64)
+        self.incomplete_total = np.zeros_like(self.incomplete)
+        self._bucket_counts = None
+
+    def add(self, vehicle_class, origin, destination, timestamp=None):
+        """Count one completed track going from zone `origin` to zone `destination`.
+
+        Trip dimasukkan ke bucket `timestamp` (waktu track terakhir terlihat);
+        track baru selesai setelah timeout, jadi bucket-nya bisa sudah ditutup.
+        """
+        c = int(np.searchsorted(VOTE_CLASSES, vehicle_class))
+        if c < len(VOTE_CLASSES) and VOTE_CLASSES[c] == vehicle_class:
+            self.total[c, origin, destination] += 1
+            bucket = self.closed_bucket(timestamp)
+            if bucket is None:
+                self.matrix[c, origin, destination] += 1
+            else:
+                bucket['od'][CLASS_NAMES[int(vehicle_class)]][origin][destination] += 1
+
+    def add_events(self, events):
+        """Add the 'complete' events of a ZoneCounter update; 'incomplete' trips are only counted"""
+        for event in events:
+            if event['event'] == 'complete':
+                self.add(event['class'], event['origin'], event['destination'], event['timestamp'])
+            elif event['event'] == 'incomplete':
+                c = int(np.searchsorted(VOTE_CLASSES, event['class']))
+                if c < len(VOTE_CLASSES) and VOTE_CLASSES[c] == event['class']:
+                    self.incomplete_total[c] += 1
+                    bucket = self.closed_bucket(event['timestamp'])
+                    if bucket is None:
+                        self.incomplete[c] += 1
+                    else:
+                        bucket['incomplete'][CLASS_NAMES[int(event['class'])]] += 1
+
+    def roll(self, timestamp, get_counts):
+        """Close the current bucket once `timestamp` passes its end.
+
+        `get_counts` (VehicleTracker.get_counts) hanya dipanggil saat pindah
+        bucket; directional count per bucket = selisih terhadap awal bucket.
+        """
+        if not self.due(timestamp):
+            return None
+        counts = get_counts()
+        bucket = super().roll(timestamp, counts)
+        self._bucket_counts = counts
+        return bucket
+
+    def snapshot(self, counts=None):
+        """Current (open) bucket as a plain dict"""
+        return dict(
+            self._bucket_range(),
+            zones=self.zone_names,
+            od={CLASS_NAMES[int(c)]: self.matrix[i].tolist() for i, c in enumerate(VOTE_CLASSES)},
+            incomplete={CLASS_NAMES[int(c)]: int(self.incomplete[i]) for i, c in enumerate(VOTE_CLASSES)},
+            directional=_count_delta(counts, self._bucket_counts) if counts is not None else {}
+        )
+
+    def _clear_bucket(self):
+        self.matrix[:] = 0
+        self.incomplete[:] = 0
+
+    def reset(self):
+        super().reset()
+        self.matrix[:] = 0
+        self.total[:] = 0
+        self.incomplete[:] = 0
+        self.incomplete_total[:] = 0
+        self._bucket_counts = None
+
+
+def _count_delta(counts, start):
+    """Directional counts accumulated since `start` (both from get_counts())"""
+    start = start or {}
+    delta = {}
+    for key in ('up', 'down'):
+        before = start.get(key, {})
+        delta[key] = {k: v - before.get(k, 0) for k, v in counts[key].items() if v - before.get(k, 0)}
+    for key in ('total_up', 'total_down'):
+        delta[key] = counts[key] - start.get(key, 0)
+    return delta
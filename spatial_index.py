@@ -0,0 +1,73 @@
+"""
+Uniform grid spatial index untuk candidate pairs deteksi-track
+"""
+
+from collections import defaultdict
+import numpy as np
+
+NO_CELL = np.iinfo(np.int64).min
+NEIGHBOR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+class GridIndex:
+    """Hash grid over track positions keyed by store slot.
+
+    Dengan cell_size = max_distance, semua track dalam jarak max_distance dari
+    sebuah titik pasti berada di 3x3 cell di sekitarnya.
+    """
+
+    def __init__(self, cell_size, capacity=64):
+        self.cell_size = float(cell_size)
+        self.cells = defaultdict(set)
+        self.cell_of = np.full((capacity, 2), NO_CELL, dtype=np.int64)
+
+    def _keys(self, positions):
+        return np.floor(np.asarray(positions, dtype=np.float64) / self.cell_size).astype(np.int64)
+
+    def update(self, slots, positions):
+        """Move slots to the cells of their new positions, touching only slots that changed cell"""
+        if len(slots) == 0:
+            return
+        if slots.max() >= len(self.cell_of):
+            grown = np.full((max(slots.max() + 1, 2 * len(self.cell_of)), 2), NO_CELL, dtype=np.int64)
+            grown[:len(self.cell_of)] = self.cell_of
+            self.cell_of = grown
+
+        keys = self._keys(positions)
+        changed = np.any(self.cell_of[slots] != keys, axis=1)
+        for slot, old, new in zip(slots[changed].tolist(), self.cell_of[slots[changed]].tolist(),
+                                  keys[changed].tolist()):
+            if old[0] != NO_CELL:
+                self._discard(tuple(old), slot)
+            self.cells[tuple(new)].add(slot)
+        self.cell_of[slots[changed]] = keys[changed]
+
+    def remove(self, slots):
+        for slot in np.asarray(slots).tolist():
+            old = self.cell_of[slot]
+            if old[0] != NO_CELL:
+                self._discard((int(old[0]), int(old[1])), slot)
+                self.cell_of[slot] = NO_CELL
+
+    def _discard(self, key, slot):
+        cell = self.cells[key]
+        cell.discard(slot)
+        if not cell:
+            del self.cells[key]
+
+    def clear(self):
+        self.cells.clear()
+        self.cell_of[:] = NO_CELL
+
+    def query(self, points):
+        """Candidate (point index, slot) pairs from the 3x3 neighborhood of each point"""
+        point_idx = []
+        slot_idx = []
+        cells = self.cells
+        for i, (kx, ky) in enumerate(self._keys(points).tolist()):
+            for dx, dy in NEIGHBOR_OFFSETS:
+                cell = cells.get((kx + dx, ky + dy))
+                if cell:
+                    point_idx.extend([i] * len(cell))
+                    slot_idx.extend(cell)
+        return np.array(point_idx, dtype=np.intp), np.array(slot_idx, dtype=np.intp)
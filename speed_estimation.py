@@ -0,0 +1,230 @@
+"""
+Estimasi kecepatan kendaraan dari kalibrasi dua garis atau homography ground plane
+"""
+
+import numpy as np
+from config import SPEED_CONFIG, CLASS_NAMES
+from track_store import VOTE_CLASSES, SlotState, TimeBuckets
+
+
+def homography_from_points(image_points, ground_points):
+    """3x3 homography mapping image pixels to ground coordinates (meter), from 4+ point pairs.
+
+    DLT dengan normalisasi Hartley agar stabil untuk koordinat pixel besar.
+    """
+    src = np.asarray(image_points, dtype=np.float64)
+    dst = np.asarray(ground_points, dtype=np.float64)
+    if len(src) < 4 or src.shape != dst.shape:
+        raise ValueError("Homography needs at least 4 image/ground point pairs")
+
+    def normalizer(points):
+        center = points.mean(axis=0)
+        scale = np.sqrt(2) / max(np.hypot(*(points - center).T).mean(), 1e-9)
+        return np.array([[scale, 0, -scale * center[0]], [0, scale, -scale * center[1]], [0, 0, 1]])
+
+    t_src, t_dst = normalizer(src), normalizer(dst)
+    s = np.column_stack([src, np.ones(len(src))]) @ t_src.T
+    d = np.column_stack([dst, np.ones(len(dst))]) @ t_dst.T
+    rows = []
+    for (x, y, _), (u, v, _) in zip(s, d):
+        rows.append([-x, -y, -1, 0, 0, 0, u * x, u * y, u])
+        rows.append([0, 0, 0, -x, -y, -1, v * x, v * y, v])
+    h = np.linalg.svd(np.array(rows))[2][-1].reshape(3, 3)
+    h = np.linalg.inv(t_dst) @ h @ t_src
+    return h / h[2, 2]
+
+
+def project(homography, points):
+    """Apply a homography to (n, 2) points"""
+    points = np.asarray(points, dtype=np.float64)
+    mapped = points @ homography[:, :2].T + homography[:, 2]
+    return mapped[:, :2] / mapped[:, 2:3]
+
+
+class SpeedStats(TimeBuckets):
+    """Per-class speed histogram per time bucket (bounded, O(1) per sample)"""
+
+    def __init__(self, bucket_seconds=None, max_buckets=None, bin_kmh=None, max_kmh=None):
+        super().__init__(bucket_seconds or SPEED_CONFIG['bucket_seconds'], max_buckets or SPEED_CONFIG['max_buckets'])
+        self.bin_kmh = bin_kmh or SPEED_CONFIG['bin_kmh']
+        max_kmh = max_kmh or SPEED_CONFIG['max_kmh']
+        self.n_bins = int(np.ceil(max_kmh / self.bin_kmh))
+        # Bin terakhir menampung semua kecepatan >= max_kmh
+        self.histogram = np.zeros((len(VOTE_CLASSES), self.n_bins), dtype=np.int64)
+        self.speed_sum = np.zeros(len(VOTE_CLASSES))
+
+    def add(self, classes, speeds, timestamp):
+        """Add speed samples (km/h) of one frame"""
+        self.roll(timestamp)
+        if len(speeds) == 0:
+            return
+        column = np.searchsorted(VOTE_CLASSES, classes)
+        bins = np.minimum((np.asarray(speeds) / self.bin_kmh).astype(np.int64), self.n_bins - 1)
+        np.add.at(self.histogram, (column, bins), 1)
+        np.add.at(self.speed_sum, column, speeds)
+
+    def distribution(self, c):
+        """Count, mean and 50th / 85th percentile (bin center) of one class row"""
+        counts = self.histogram[c]
+        n = int(counts.sum())
+        if n == 0:
+            return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p85': 0.0}
+        cumulative = np.cumsum(counts)
+        p50, p85 = (np.searchsorted(cumulative, [0.5 * n, 0.85 * n]) + 0.5) * self.bin_kmh
+        return {'count': n, 'mean': float(self.speed_sum[c] / n), 'p50': float(p50), 'p85': float(p85)}
+
+    def summary(self):
+        """Distribution per class name of the open bucket (without histograms)"""
+        return {CLASS_NAMES[int(cls)]: self.distribution(c) for c, cls in enumerate(VOTE_CLASSES)}
+
+    def snapshot(self):
+        """Current (open) bucket as a plain dict"""
+        return dict(
+            self._bucket_range(),
+            bin_kmh=self.bin_kmh,
+            classes={
+                CLASS_NAMES[int(cls)]: dict(self.distribution(c), histogram=self.histogram[c].tolist())
+                for c, cls in enumerate(VOTE_CLASSES)
+            }
+        )
+
+    def _clear_bucket(self):
+        self.histogram[:] = 0
+        self.speed_sum[:] = 0
+
+    def reset(self):
+        super().reset()
+        self._clear_bucket()
+
+
+class SpeedEstimator(SlotState):
+    """Per-track speed (km/h) for all tracks, updated vectorized every frame.
+
+    Mode 'lines': waktu crossing dua garis diinterpolasi sub-frame dari
+    segment path (posisi berubah linear antar deteksi), speed = jarak /
+    selisih waktu. Mode 'homography': jarak ground plane deteksi pertama ke
+    terakhir dibagi durasi track (jitter deteksi tidak menambah panjang path
+    seperti pada penjumlahan per segment); titik coast tidak dipakai.
+    """
+
+    def __init__(self, homography=None, lines=None, line_distance_m=None, min_duration=None, smoothing=None):
+        if (homography is None) == (lines is None):
+            raise ValueError("Speed calibration needs either a homography or two lines")
+        if lines is not None and (len(lines) != 2 or not line_distance_m):
+            raise ValueError("Line calibration needs exactly two lines and their distance in meters")
+        self.mode = 'homography' if homography is not None else 'lines'
+        self.homography = None if homography is None else np.asarray(homography, dtype=np.float64)
+        if lines is not None:
+            points = np.asarray(lines, dtype=np.float64).reshape(2, 2, 2)
+            self.line_p1 = points[:, 0]
+            self.line_direction = points[:, 1] - points[:, 0]
+            self.line_normals = np.stack([-self.line_direction[:, 1], self.line_direction[:, 0]], axis=1)
+            self.line_offsets = np.einsum('ij,ij->i', self.line_normals, self.line_p1)
+            self.line_length_sq = np.einsum('ij,ij->i', self.line_direction, self.line_direction)
+        self.line_distance_m = line_distance_m
+        self.min_duration = SPEED_CONFIG['min_duration'] if min_duration is None else min_duration
+        self.smoothing = SPEED_CONFIG['smoothing'] if smoothing is None else smoothing
+        self.stats = SpeedStats()
+        # speed = kecepatan terakhir per slot (km/h), NaN = belum diketahui
+        super().__init__(last_point=(np.float64, 0.0, (2,)), last_time=(np.float64, 0.0, ()),
+                         first_time=(np.float64, 0.0, ()), first_ground=(np.float64, 0.0, (2,)),
+                         cross_time=(np.float64, np.nan, (2,)), speed=(np.float64, np.nan, ()))
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Estimator from SPEED_CONFIG (None when no calibration is configured)"""
+        config = config or SPEED_CONFIG
+        if config.get('homography_points'):
+            image_points, ground_points = zip(*config['homography_points'])
+            return cls(homography=homography_from_points(image_points, ground_points))
+        if config.get('lines'):
+            return cls(lines=config['lines'], line_distance_m=config['line_distance_m'])
+        return None
+
+    def update(self, store, timestamp, offset=(0, 0)):
+        """Update all tracks and return this frame's speed samples [(track_id, class, km/h)].
+
+        `offset` adalah pergeseran camera sejak kalibrasi (seperti ZoneCounter).
+        """
+        self._ensure_capacity(store.capacity)
+        active = store.active
+        ended = self._ended(store)
+        ids, classes, speeds = [], [], []
+        if self.mode == 'homography':
+            # Sample homography = rata-rata speed sepanjang track, dicatat saat track selesai
+            duration = self.last_time - self.first_time
+            done = np.flatnonzero(ended & (duration >= self.min_duration))
+            travelled = np.hypot(*(project(self.homography, self.last_point[done]) - self.first_ground[done]).T)
+            ids.append(self.slot_ids[done])
+            classes.append(self.slot_classes[done])
+            speeds.append(travelled / duration[done] * 3.6)
+        self.speed[ended] = np.nan
+        self.cross_time[ended] = np.nan
+
+        points = store.centers.astype(np.float64) - np.asarray(offset)
+        new = active & (store.ids != self.slot_ids)
+        self.last_point[new] = points[new]
+        self.last_time[new] = store.last_seen[new]
+        self.first_time[new] = store.last_seen[new]
+        if self.mode == 'homography':
+            self.first_ground[new] = project(self.homography, points[new])
+        self.speed[new] = np.nan
+        self.cross_time[new] = np.nan
+
+        # Hanya track yang mendapat deteksi baru sejak update sebelumnya
+        measured = np.flatnonzero(active & ~new & (store.last_seen > self.last_time))
+        if len(measured):
+            p0, p1 = self.last_point[measured], points[measured]
+            t0, t1 = self.last_time[measured], store.last_seen[measured]
+            if self.mode == 'homography':
+                step = np.hypot(*(project(self.homography, p1) - project(self.homography, p0)).T)
+                instant = step / np.maximum(t1 - t0, 1e-6) * 3.6
+                previous = self.speed[measured]
+                self.speed[measured] = np.where(np.isnan(previous), instant,
+                                                previous + self.smoothing * (instant - previous))
+            else:
+                # Sample lines = speed antara dua garis, dicatat saat garis kedua dilewati
+                done = measured[self._cross_lines(measured, p0, p1, t0, t1)]
+                ids.append(store.ids[done])
+                classes.append(store.classes[done])
+                speeds.append(self.speed[done])
+            self.last_point[measured] = p1
+            self.last_time[measured] = t1
+
+        self._record(store)
+
+        if not ids:
+            self.stats.add([], [], timestamp)
+            return []
+        ids, classes, speeds = np.concatenate(ids), np.concatenate(classes), np.concatenate(speeds)
+        self.stats.add(classes, speeds, timestamp)
+        return list(zip(ids.tolist(), classes.tolist(), speeds.tolist()))
+
+    def _cross_lines(self, slots, p0, p1, t0, t1):
+        """Record interpolated crossing times of both lines; mask of tracks that just got a speed"""
+        s0 = p0 @ self.line_normals.T - self.line_offsets
+        s1 = p1 @ self.line_normals.T - self.line_offsets
+        # Half-open side test: titik tepat di garis tidak membuat crossing hilang
+        crossed = (s0 >= 0) != (s1 >= 0)
+        # Fraksi segment saat crossing -> waktu sub-frame dan titik potong harus di dalam garis
+        fraction = s0 / np.where(crossed, s0 - s1, 1.0)
+        hit = p0[:, None, :] + fraction[..., None] * (p1 - p0)[:, None, :]
+        along = np.einsum('nlj,lj->nl', hit - self.line_p1, self.line_direction)
+        crossed &= (along >= 0) & (along <= self.line_length_sq)
+        times = t0[:, None] + fraction * (t1 - t0)[:, None]
+
+        before = self.cross_time[slots]
+        first = crossed & np.isnan(before)
+        self.cross_time[slots] = np.where(first, times, before)
+        after = self.cross_time[slots]
+        done = np.isnan(self.speed[slots]) & ~np.isnan(after).any(axis=1)
+        elapsed = np.abs(after[:, 1] - after[:, 0])
+        done &= elapsed > 0
+        self.speed[slots[done]] = self.line_distance_m / elapsed[done] * 3.6
+        return done
+
+    def reset(self):
+        self.slot_ids[:] = -1
+        self.speed[:] = np.nan
+        self.cross_time[:] = np.nan
+        self.stats.reset()
@@ -0,0 +1,397 @@
+"""
+Struct-of-arrays track store untuk VehicleTracker
+"""
+
+import json
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+import numpy as np
+from config import TRACKING_CONFIG, VEHICLE_CLASSES
+
+TRACK_FIELDS = ('center', 'bbox', 'class', 'last_seen', 'path', 'confidence', 'is_counted')
+# Kolom histogram class per track, urut sesuai VEHICLE_CLASSES
+VOTE_CLASSES = np.array(sorted(VEHICLE_CLASSES), dtype=np.int32)
+
+
+class TrackView(Mapping):
+    """Read-only dict-like view of one track, backed by the store arrays"""
+
+    __slots__ = ('_store', '_slot', 'track_id')
+
+    def __init__(self, store, slot, track_id):
+        self._store = store
+        self._slot = slot
+        self.track_id = track_id
+
+    def __getitem__(self, key):
+        store, slot = self._store, self._slot
+        if key == 'center':
+            return store.centers[slot].tolist()
+        if key == 'bbox':
+            return store.bboxes[slot].tolist()
+        if key == 'class':
+            return int(store.classes[slot])
+        if key == 'last_seen':
+            return float(store.last_seen[slot])
+        if key == 'path':
+            return store.get_path(slot)
+        if key == 'confidence':
+            return float(store.confidence[slot])
+        if key == 'is_counted':
+            return bool(store.counted[slot])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(TRACK_FIELDS)
+
+    def __len__(self):
+        return len(TRACK_FIELDS)
+
+
+class TrackStore(Mapping):
+    """Preallocated numpy arrays per track field with free-list slot reuse.
+
+    Mapping dari track id ke TrackView, sehingga kode yang memakai
+    `tracked_vehicles.items()` tetap berjalan.
+    """
+
+    def __init__(self, capacity=64):
+        # History path + posisi sekarang, sama seperti list path sebelumnya
+        self.path_capacity = TRACKING_CONFIG['path_history_length'] + 1
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.centers = np.zeros((capacity, 2), dtype=np.int32)
+        self.bboxes = np.zeros((capacity, 4), dtype=np.int32)
+        self.classes = np.zeros(capacity, dtype=np.int32)
+        # Histogram class per track (bobot confidence); `classes` = majority vote
+        self.class_votes = np.zeros((capacity, len(VOTE_CLASSES)), dtype=np.float32)
+        self.confidence = np.zeros(capacity, dtype=np.float32)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.last_frame = np.zeros(capacity, dtype=np.int64)
+        self.counted = np.zeros(capacity, dtype=bool)
+        # Bitmask counting line (bit per line) yang sudah menghitung track ini
+        self.counted_lines = np.zeros(capacity, dtype=np.int64)
+        # Class dan arah count milik track ini: bitmask line up / down dan jumlah count total up / down
+        self.counted_class = np.zeros(capacity, dtype=np.int32)
+        self.counted_up = np.zeros(capacity, dtype=np.int64)
+        self.counted_down = np.zeros(capacity, dtype=np.int64)
+        self.totals_up = np.zeros(capacity, dtype=np.int32)
+        self.totals_down = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        # Ring buffer path semua track: setiap titik ditulis dua kali (i dan i + path_capacity)
+        # sehingga `path_capacity` titik terakhir selalu berupa slice kontigu
+        self.paths = np.zeros((capacity, 2 * self.path_capacity, 2), dtype=np.int32)
+        # Timestamp frame setiap titik path, layout ring buffer yang sama
+        self.path_times = np.zeros((capacity, 2 * self.path_capacity), dtype=np.float64)
+        # False untuk titik prediksi (coast), True untuk titik dari deteksi
+        self.path_detected = np.zeros((capacity, 2 * self.path_capacity), dtype=bool)
+        self.path_head = np.zeros(capacity, dtype=np.int32)
+        self.path_len = np.zeros(capacity, dtype=np.int32)
+        self.slot_of = {}
+        self.free_slots = list(range(capacity - 1, -1, -1))
+
+    def _grow(self):
+        """Double capacity, keeping existing slots in place"""
+        old = self.capacity
+        new = old * 2
+        for name in ('ids', 'centers', 'bboxes', 'classes', 'class_votes', 'confidence', 'last_seen', 'last_frame',
+                     'counted', 'counted_lines', 'counted_class', 'counted_up', 'counted_down', 'totals_up',
+                     'totals_down', 'active', 'paths', 'path_times', 'path_detected', 'path_head', 'path_len'):
+            array = getattr(self, name)
+            grown = np.zeros((new,) + array.shape[1:], dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        self.ids[old:] = -1
+        self.free_slots = list(range(new - 1, old - 1, -1)) + self.free_slots
+        self.capacity = new
+
+    def clear(self):
+        self._allocate(self.capacity)
+
+    def active_slots(self):
+        """Slots of all live tracks"""
+        return np.flatnonzero(self.active)
+
+    def add(self, track_id, center, bbox, cls, confidence, now, frame_index=0):
+        """Create a new track and return its slot"""
+        if not self.free_slots:
+            self._grow()
+        slot = self.free_slots.pop()
+        self.ids[slot] = track_id
+        self.centers[slot] = center
+        self.bboxes[slot] = bbox
+        self.class_votes[slot] = 0
+        self._vote(np.array([slot]), np.array([cls]), np.array([confidence]))
+        self.confidence[slot] = confidence
+        self.last_seen[slot] = now
+        self.last_frame[slot] = frame_index
+        self.counted[slot] = False
+        self.counted_lines[slot] = 0
+        self.counted_up[slot] = 0
+        self.counted_down[slot] = 0
+        self.totals_up[slot] = 0
+        self.totals_down[slot] = 0
+        self.active[slot] = True
+        self.path_head[slot] = 0
+        self.path_len[slot] = 0
+        self._append_path(np.array([slot]), np.asarray(center).reshape(1, 2), now)
+        self.slot_of[track_id] = slot
+        return slot
+
+    def update_many(self, slots, centers, bboxes, classes, confidences, now, frame_index=0):
+        """Write matched detections into their track slots"""
+        if len(slots) == 0:
+            return
+        self.centers[slots] = centers
+        self.bboxes[slots] = bboxes
+        self._vote(slots, classes, confidences)
+        self.confidence[slots] = confidences
+        self.last_seen[slots] = now
+        self.last_frame[slots] = frame_index
+        self._append_path(slots, centers, now)
+
+    def _vote(self, slots, classes, confidences):
+        """Add detection classes to the track histograms and refresh the voted class"""
+        column = np.searchsorted(VOTE_CLASSES, classes)
+        self.class_votes[slots, column] += confidences
+        self.classes[slots] = VOTE_CLASSES[np.argmax(self.class_votes[slots], axis=1)]
+
+    def _append_path(self, slots, points, now, detected=True):
+        """O(1) append of one point (and its timestamp) per slot into the path ring buffer"""
+        head = self.path_head[slots]
+        self.paths[slots, head] = points
+        self.paths[slots, head + self.path_capacity] = points
+        self.path_times[slots, head] = now
+        self.path_times[slots, head + self.path_capacity] = now
+        self.path_detected[slots, head] = detected
+        self.path_detected[slots, head + self.path_capacity] = detected
+        self.path_head[slots] = (head + 1) % self.path_capacity
+        self.path_len[slots] = np.minimum(self.path_len[slots] + 1, self.path_capacity)
+
+    def coast(self, slots, points, now):
+        """Extend the path of unmatched tracks with predicted positions (flagged as not detected)"""
+        if len(slots) == 0:
+            return
+        self._append_path(slots, points, now, detected=False)
+
+    def translate(self, slots, shift):
+        """Shift positions, boxes and paths of the given slots by a camera move (dx, dy)"""
+        if len(slots) == 0:
+            return
+        self.centers[slots] += shift
+        self.bboxes[slots] += np.tile(shift, 2)
+        self.paths[slots] += shift
+
+    def remove_slots(self, slots):
+        """Free slots so they can be reused by new tracks"""
+        for slot in np.asarray(slots).tolist():
+            del self.slot_of[int(self.ids[slot])]
+            self.ids[slot] = -1
+            self.active[slot] = False
+            self.free_slots.append(slot)
+
+    def last_points(self, slots, k):
+        """Last k path points of each slot as a (len(slots), k, 2) array, oldest first.
+
+        Slot dengan path lebih pendek dari k berisi titik-titik lama yang tidak
+        valid di awal; gunakan `path_len` untuk masking.
+        """
+        return self.paths[slots[:, None], self._last_index(slots, k)]
+
+    def last_times(self, slots, k):
+        """Timestamps of the points returned by last_points, shape (len(slots), k)"""
+        return self.path_times[slots[:, None], self._last_index(slots, k)]
+
+    def last_detected(self, slots, k):
+        """Detected (not coasted) flag of the points returned by last_points, shape (len(slots), k)"""
+        return self.path_detected[slots[:, None], self._last_index(slots, k)]
+
+    def _last_index(self, slots, k):
+        end = self.path_head[slots] + self.path_capacity
+        return end[:, None] - np.arange(k, 0, -1)[None, :]
+
+    def get_path(self, slot, k=None):
+        """Zero-copy view of the last k (default: all) path points of a slot"""
+        length = int(self.path_len[slot])
+        k = length if k is None else min(k, length)
+        end = int(self.path_head[slot]) + self.path_capacity
+        return self.paths[slot, end - k:end]
+
+    def mark_counted(self, track_id, lines=1):
+        """Mark a track as counted on the lines in the `lines` bitmask"""
+        slot = self.slot_of[track_id]
+        self.counted[slot] = True
+        self.counted_lines[slot] |= lines
+
+    def record_count(self, slot, lines, up, total):
+        """Remember class and direction of a count, so it can be moved when the voted class changes"""
+        self.counted_class[slot] = self.classes[slot]
+        if up:
+            self.counted_up[slot] |= lines
+        else:
+            self.counted_down[slot] |= lines
+        if total:
+            (self.totals_up if up else self.totals_down)[slot] += 1
+
+    def __getitem__(self, track_id):
+        return TrackView(self, self.slot_of[track_id], track_id)
+
+    def __iter__(self):
+        return iter(list(self.slot_of))
+
+    def __len__(self):
+        return len(self.slot_of)
+
+
+class SlotState:
+    """Slot-indexed side state of a TrackStore consumer (zones, speed), growing with the store.
+
+    Field dideklarasikan sekali sebagai name=(dtype, fill, shape); setiap
+    update `ended` memberi slot yang track-nya selesai (expire atau slot
+    dipakai track lain) sejak `record` terakhir.
+    """
+
+    def __init__(self, **fields):
+        self.capacity = 0
+        self._slot_fields = dict(slot_ids=(np.int64, -1, ()), slot_classes=(np.int32, 0, ()), **fields)
+        for name, (dtype, fill, shape) in self._slot_fields.items():
+            setattr(self, name, np.full((0,) + shape, fill, dtype=dtype))
+
+    def _ensure_capacity(self, capacity):
+        """Follow the track store capacity, new slots get the field fill values"""
+        if capacity <= self.capacity:
+            return
+        grow = capacity - self.capacity
+        for name, (dtype, fill, shape) in self._slot_fields.items():
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.full((grow,) + shape, fill, dtype=dtype)]))
+        self.capacity = capacity
+
+    def _ended(self, store):
+        """Mask of slots whose recorded track ended since the last record"""
+        return (self.slot_ids >= 0) & (~store.active | (store.ids != self.slot_ids))
+
+    def _record(self, store):
+        """Remember the track (and class) owning each slot for the next update"""
+        self.slot_ids = np.where(store.active, store.ids, -1)
+        self.slot_classes = store.classes.copy()
+
+
+class TimeBuckets:
+    """Fixed-length time buckets: the open bucket plus a bounded deque of closed ones.
+
+    Subclass menyimpan state bucket terbuka sendiri dan mengimplementasi
+    snapshot (dict bucket) dan _clear_bucket; bucket yang ditutup disimpan
+    sebagai dict dan di-export ke JSON.
+    """
+
+    def __init__(self, bucket_seconds, max_buckets):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = deque(maxlen=max_buckets)
+        self.bucket_start = None
+
+    def due(self, timestamp):
+        """True if `timestamp` opens the first bucket or passes the end of the open one"""
+        return (self.bucket_start is None or
+                timestamp // self.bucket_seconds * self.bucket_seconds > self.bucket_start)
+
+    def roll(self, timestamp, *args):
+        """Close the open bucket once `timestamp` passes its end, returns the closed bucket (or None).
+
+        `args` diteruskan ke snapshot saat bucket ditutup.
+        """
+        if not self.due(timestamp):
+            return None
+        bucket = None
+        if self.bucket_start is not None:
+            bucket = self.snapshot(*args)
+            self.buckets.append(bucket)
+        self.bucket_start = timestamp // self.bucket_seconds * self.bucket_seconds
+        self._clear_bucket()
+        return bucket
+
+    def closed_bucket(self, timestamp):
+        """Closed bucket containing `timestamp`; None for the open bucket (or one no longer kept)"""
+        if timestamp is None or self.bucket_start is None or timestamp >= self.bucket_start:
+            return None
+        for bucket in reversed(self.buckets):
+            if bucket['start'] <= timestamp < bucket['end']:
+                return bucket
+        return None
+
+    def _bucket_range(self):
+        start = self.bucket_start or 0.0
+        return {'start': float(start), 'end': float(start + self.bucket_seconds)}
+
+    def snapshot(self, *args):
+        """Current (open) bucket as a plain dict"""
+        raise NotImplementedError
+
+    def _clear_bucket(self):
+        """Clear the per-bucket state when a new bucket opens"""
+
+    def export_json(self, path, *args):
+        """Write the closed buckets (and the open one) to a JSON file"""
+        data = list(self.buckets)
+        if self.bucket_start is not None:
+            data.append(self.snapshot(*args))
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return len(data)
+
+    def reset(self):
+        self.buckets.clear()
+        self.bucket_start = None
+
+
+class RecentlyCounted:
+    """Bounded record of recently counted keys with a bitmask payload (LRU with time-to-live).
+
+    Status counted disimpan di track itself; struktur ini hanya mengingat id
+    (dan bitmask line-nya) yang baru saja dihitung setelah track-nya expire,
+    dengan ukuran tetap. Key boleh apa saja yang hashable, misal
+    (source, track_id) untuk CountDeduplicator.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or TRACKING_CONFIG['recently_counted_size']
+        self.ttl = ttl or TRACKING_CONFIG['recently_counted_ttl']
+        self._entries = OrderedDict()
+
+    def add(self, key, timestamp, lines=1):
+        """Record (or refresh) a key; its timestamp restarts the ttl and `lines` is OR-ed into its mask"""
+        _, counted = self._entries.get(key, (timestamp, 0))
+        self._entries[key] = (timestamp, counted | lines)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def prune(self, now):
+        """Drop entries older than ttl (oldest first)"""
+        while self._entries:
+            key, (timestamp, _) = next(iter(self._entries.items()))
+            if now - timestamp < self.ttl:
+                break
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def clear_lines(self, lines):
+        """Forget the counted state of the lines in the `lines` bitmask"""
+        for track_id, (timestamp, counted) in list(self._entries.items()):
+            self._entries[track_id] = (timestamp, counted & ~lines)
+
+    def line_masks(self, track_ids):
+        """Counted-line bitmask per track id (0 for ids that are not remembered)"""
+        entries = self._entries
+        return np.array([entries[t][1] if t in entries else 0 for t in track_ids.tolist()], dtype=np.int64)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
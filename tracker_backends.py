@@ -0,0 +1,428 @@
+"""
+Tracker backends yang mengisi TrackStore bersama untuk VehicleTracker
+"""
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from config import TRACKING_CONFIG, MODEL_CONFIG, VEHICLE_CLASSES
+from motion_model import KalmanMotionModel
+from spatial_index import GridIndex
+from reid import AppearanceReId
+
+GATED_COST = 1e6
+
+
+def _squared_distance(points, centers):
+    dx = points[:, None, 0] - centers[None, :, 0]
+    dy = points[:, None, 1] - centers[None, :, 1]
+    dx *= dx
+    dy *= dy
+    dx += dy
+    return dx
+
+
+def pairwise_distance(points, centers, predicted=None):
+    """Distance matrix (points x tracks), using the closer of current and predicted position"""
+    squared = _squared_distance(points, centers)
+    if predicted is not None:
+        np.minimum(squared, _squared_distance(points, predicted), out=squared)
+    return np.sqrt(squared, out=squared)
+
+
+def optimal_assignment(cost, max_cost):
+    """One-to-one Hungarian assignment, pairs with cost >= max_cost are rejected"""
+    valid = cost < max_cost
+    if not valid.any():
+        return []
+    # Solver hanya untuk baris/kolom yang punya minimal satu kandidat dalam gate
+    row_idx = np.flatnonzero(valid.any(axis=1))
+    col_idx = np.flatnonzero(valid.any(axis=0))
+    sub_valid = valid[np.ix_(row_idx, col_idx)]
+    # Pasangan di luar gate diberi cost besar tapi finite agar solver tetap feasible
+    gated = np.where(sub_valid, cost[np.ix_(row_idx, col_idx)], GATED_COST)
+    rows, cols = linear_sum_assignment(gated)
+    keep = sub_valid[rows, cols]
+    return list(zip(row_idx[rows[keep]].tolist(), col_idx[cols[keep]].tolist()))
+
+
+def sparse_assignment(rows, cols, cost, n_rows, n_cols):
+    """Optimal one-to-one assignment over gated candidate pairs.
+
+    Graph bipartite dipecah per connected component; component dengan satu
+    pasangan langsung di-match, sisanya diselesaikan Hungarian secara terpisah.
+    """
+    if len(rows) == 0:
+        return []
+    graph = coo_matrix((np.ones(len(rows)), (rows, cols + n_rows)), shape=(n_rows + n_cols, n_rows + n_cols))
+    _, labels = connected_components(graph, directed=False)
+    component = labels[rows]
+    pair_count = np.bincount(component)
+
+    single = pair_count[component] == 1
+    pairs = list(zip(rows[single].tolist(), cols[single].tolist()))
+
+    multi = np.flatnonzero(~single)
+    order = multi[np.argsort(component[multi], kind='stable')]
+    bounds = np.flatnonzero(np.diff(component[order])) + 1
+    for group in np.split(order, bounds):
+        if len(group) == 0:
+            continue
+        row_ids, r = np.unique(rows[group], return_inverse=True)
+        col_ids, c = np.unique(cols[group], return_inverse=True)
+        dense = np.full((len(row_ids), len(col_ids)), GATED_COST)
+        dense[r, c] = cost[group]
+        sub_rows, sub_cols = linear_sum_assignment(dense)
+        keep = dense[sub_rows, sub_cols] < GATED_COST
+        pairs.extend(zip(row_ids[sub_rows[keep]].tolist(), col_ids[sub_cols[keep]].tolist()))
+    return pairs
+
+
+class TrackerBackend:
+    """Base class: update the shared track store from one frame.
+
+    Semua backend menulis ke TrackStore yang sama, sehingga line crossing,
+    drawing dan counting tidak tergantung backend yang dipakai.
+    """
+
+    # True jika backend menjalankan detection sendiri (detections diabaikan)
+    runs_detection = False
+
+    def __init__(self, store):
+        self.store = store
+        self.min_confidence = MODEL_CONFIG['detection_confidence']
+        self.next_id = 0
+        self.frame_index = 0
+        # (width, height) frame; track yang posisi prediksinya keluar frame langsung expire
+        self.frame_size = None
+
+    def update(self, detections, now, frame=None):
+        raise NotImplementedError
+
+    def _expired(self, slots, now):
+        """Mask of slots not seen for track_timeout_frames frames (if set), else track_timeout seconds"""
+        store = self.store
+        if TRACKING_CONFIG['track_timeout_frames']:
+            return self.frame_index - store.last_frame[slots] >= TRACKING_CONFIG['track_timeout_frames']
+        return now - store.last_seen[slots] >= TRACKING_CONFIG['track_timeout']
+
+    def compensate(self, shift):
+        """Shift internal motion state by a global camera move (store is shifted by the caller)"""
+
+    def reset(self):
+        self.next_id = 0
+        self.frame_index = 0
+
+
+class CentroidBackend(TrackerBackend):
+    """Centroid distance tracker with Kalman prediction, two-stage association and optional re-ID"""
+
+    def __init__(self, store, two_stage=None, spatial_index=None, reid=None, class_agnostic=None):
+        super().__init__(store)
+        self.two_stage = TRACKING_CONFIG['two_stage_association'] if two_stage is None else two_stage
+        # Class-agnostic: YOLO yang berganti car/truck tidak membuat track baru
+        self.class_agnostic = (TRACKING_CONFIG['class_agnostic_association']
+                               if class_agnostic is None else class_agnostic)
+        use_index = TRACKING_CONFIG['spatial_index'] if spatial_index is None else spatial_index
+        # Confidence minimum yang perlu diminta dari detector untuk mode ini
+        if self.two_stage:
+            self.min_confidence = MODEL_CONFIG['confidence_threshold']
+        self.motion = KalmanMotionModel(store.capacity)
+        self.spatial_index = GridIndex(TRACKING_CONFIG['max_distance']) if use_index else None
+        use_reid = TRACKING_CONFIG['reid_enabled'] if reid is None else reid
+        self.reid = AppearanceReId(store.capacity) if use_reid else None
+
+    def update(self, detections, now, frame=None):
+        """Kalman prediction and optimal one-to-one association for one frame"""
+        max_distance = TRACKING_CONFIG['max_distance']
+        store = self.store
+        self.frame_index += 1
+        
+        bboxes = np.array([d['bbox'] for d in detections], dtype=np.int32).reshape(-1, 4)
+        classes = np.array([d['class'] for d in detections], dtype=np.int32)
+        confidences = np.array([d['confidence'] for d in detections], dtype=np.float32)
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) // 2
+        signatures = None
+        if self.reid is not None and frame is not None:
+            signatures = self.reid.compute(frame, bboxes)
+        
+        # Two-stage: high-confidence dulu, lalu low-confidence ke track yang tersisa
+        if self.two_stage:
+            high = confidences > MODEL_CONFIG['detection_confidence']
+        else:
+            high = np.ones(len(detections), dtype=bool)
+        high_idx = np.flatnonzero(high)
+        low_idx = np.flatnonzero(~high)
+        
+        slots = store.active_slots()
+        predicted = self.motion.predict(slots)
+        if self.spatial_index is not None:
+            self.spatial_index.update(slots, predicted)
+        det_idx, track_idx = self._associate(bboxes[high_idx], centers[high_idx], classes[high_idx], slots, predicted, max_distance)
+        det_idx = high_idx[det_idx]
+        
+        if len(low_idx):
+            remaining = np.setdiff1d(np.arange(len(slots)), track_idx)
+            low_det, low_track = self._associate(bboxes[low_idx], centers[low_idx], classes[low_idx], slots[remaining],
+                                                 predicted[remaining], TRACKING_CONFIG['low_confidence_max_distance'])
+            det_idx = np.concatenate([det_idx, low_idx[low_det]])
+            track_idx = np.concatenate([track_idx, remaining[low_track]])
+        
+        matched_slots = slots[track_idx]
+        self.motion.update(matched_slots, centers[det_idx])
+        store.update_many(matched_slots, centers[det_idx], bboxes[det_idx],
+                          classes[det_idx], confidences[det_idx], now, self.frame_index)
+        if signatures is not None:
+            self.reid.update_tracks(matched_slots, signatures[det_idx])
+        
+        # Unmatched tracks coast on their predicted position until track_timeout,
+        # kecuali prediksinya sudah keluar frame (kendaraan sudah pergi)
+        missed = np.ones(len(slots), dtype=bool)
+        missed[track_idx] = False
+        missed_slots = slots[missed]
+        missed_predicted = predicted[missed]
+        expired = self._expired(missed_slots, now)
+        if self.frame_size is not None:
+            width, height = self.frame_size
+            expired |= ((missed_predicted[:, 0] < 0) | (missed_predicted[:, 0] >= width) |
+                        (missed_predicted[:, 1] < 0) | (missed_predicted[:, 1] >= height))
+        expired_slots = missed_slots[expired]
+        if self.reid is not None:
+            self.reid.archive(expired_slots, store.ids[expired_slots], self.motion.positions(expired_slots),
+                              self.motion.velocities(expired_slots), store.classes[expired_slots],
+                              store.counted_lines[expired_slots], now, self.frame_index)
+        store.remove_slots(expired_slots)
+        if self.spatial_index is not None:
+            self.spatial_index.remove(expired_slots)
+        # Path hanya diperpanjang prediksi selama coast_frames; setelah itu track menunggu re-match saja
+        coasting = ~expired & (self.frame_index - store.last_frame[missed_slots] <= TRACKING_CONFIG['coast_frames'])
+        store.coast(missed_slots[coasting], np.rint(missed_predicted[coasting]).astype(np.int32), now)
+        
+        # New vehicles, in detection order (low-confidence detections never start a track)
+        unmatched = high.copy()
+        unmatched[det_idx] = False
+        new_idx = np.flatnonzero(unmatched)
+        
+        # Re-ID: deteksi baru yang cocok dengan lost track memakai id lama
+        revived = {}
+        if signatures is not None:
+            new_classes = None if self.class_agnostic else classes[new_idx]
+            for row, track_id, counted in self.reid.match(signatures[new_idx], centers[new_idx], new_classes,
+                                                           now, self.frame_index):
+                revived[int(new_idx[row])] = (track_id, counted)
+        
+        for i in new_idx.tolist():
+            track_id, counted = revived.get(i, (self.next_id, 0))
+            slot = store.add(track_id, centers[i], bboxes[i], classes[i], confidences[i], now, self.frame_index)
+            if counted:
+                store.mark_counted(track_id, counted)
+            if i not in revived:
+                self.next_id += 1
+            self.motion.ensure_capacity(store.capacity)
+            self.motion.initiate([slot], centers[i:i + 1])
+            if signatures is not None:
+                self.reid.ensure_capacity(store.capacity)
+                self.reid.init_tracks([slot], signatures[i:i + 1])
+
+    def _associate(self, bboxes, centers, classes, slots, predicted, max_distance):
+        """Match detections to tracks, returns (detection indices, indices into slots)"""
+        empty = np.zeros(0, dtype=np.intp)
+        if len(centers) == 0 or len(slots) == 0:
+            return empty, empty
+            
+        if self.spatial_index is not None:
+            return self._associate_indexed(centers, classes, slots, predicted, max_distance)
+            
+        store = self.store
+        track_centers = store.centers[slots].astype(np.float64)
+        
+        # Jarak ke posisi terakhir atau posisi prediksi Kalman, ambil yang terdekat
+        cost = pairwise_distance(centers.astype(np.float64), track_centers, predicted)
+        cost[self._class_conflict(classes[:, None], slots[None, :])] = np.inf
+        
+        pairs = optimal_assignment(cost, max_distance)
+        if not pairs:
+            return empty, empty
+        det_idx, track_idx = np.array(pairs, dtype=np.intp).T
+        return det_idx, track_idx
+
+    def _associate_indexed(self, centers, classes, slots, predicted, max_distance):
+        """Same as _associate, but only scores pairs from neighboring grid cells"""
+        empty = np.zeros(0, dtype=np.intp)
+        store = self.store
+        
+        # Posisi slot di array `slots`, -1 untuk slot yang tidak ikut stage ini
+        position = np.full(store.capacity, -1, dtype=np.intp)
+        position[slots] = np.arange(len(slots))
+        
+        det_idx, cand_slots = self.spatial_index.query(centers)
+        track_idx = position[cand_slots]
+        keep = (track_idx >= 0) & ~self._class_conflict(classes[det_idx], cand_slots)
+        det_idx, cand_slots, track_idx = det_idx[keep], cand_slots[keep], track_idx[keep]
+        
+        points = centers[det_idx].astype(np.float64)
+        distance = np.minimum(np.hypot(*(points - store.centers[cand_slots]).T),
+                              np.hypot(*(points - predicted[track_idx]).T))
+        valid = distance < max_distance
+        
+        pairs = sparse_assignment(det_idx[valid], track_idx[valid], distance[valid], len(centers), len(slots))
+        if not pairs:
+            return empty, empty
+        det_idx, track_idx = np.array(pairs, dtype=np.intp).T
+        return det_idx, track_idx
+
+    def _class_conflict(self, classes, slots):
+        """Mask of detection / track pairs (broadcast) that may not match because of their class.
+
+        Class-agnostic hanya untuk track yang terlihat di frame sebelumnya dan
+        vote-nya sudah cukup: track yang sedang coast atau masih muda tidak
+        boleh mengambil kendaraan class lain yang baru masuk.
+        """
+        store = self.store
+        conflict = classes != store.classes[slots]
+        if self.class_agnostic:
+            settled = ((store.last_frame[slots] >= self.frame_index - 1) &
+                       (store.class_votes[slots].sum(axis=-1) >= TRACKING_CONFIG['class_change_min_votes']))
+            conflict &= ~settled
+        return conflict
+
+    def compensate(self, shift):
+        slots = self.store.active_slots()
+        self.motion.state[slots, :2] += shift
+        if self.reid is not None:
+            self.reid.gallery_positions += shift
+
+    def reset(self):
+        super().reset()
+        if self.spatial_index is not None:
+            self.spatial_index.clear()
+        if self.reid is not None:
+            self.reid.clear()
+
+
+def bbox_iou_matrix(boxes_a, boxes_b):
+    """IoU matrix between two sets of [x1, y1, x2, y2] boxes"""
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+class IouKalmanBackend(CentroidBackend):
+    """Same pipeline as CentroidBackend, but associates on IoU with the Kalman-predicted box"""
+
+    def __init__(self, store, two_stage=None, spatial_index=None, reid=None, class_agnostic=None):
+        # Association IoU tidak memakai grid index; argumen diterima agar signature sama dengan CentroidBackend
+        super().__init__(store, two_stage=two_stage, spatial_index=False, reid=reid, class_agnostic=class_agnostic)
+        self.min_iou = TRACKING_CONFIG['min_iou']
+
+    def _associate(self, bboxes, centers, classes, slots, predicted, max_distance):
+        empty = np.zeros(0, dtype=np.intp)
+        if len(bboxes) == 0 or len(slots) == 0:
+            return empty, empty
+
+        store = self.store
+        # Box track digeser ke posisi prediksi Kalman, ukuran box terakhir dipertahankan
+        shift = predicted - store.centers[slots]
+        predicted_boxes = store.bboxes[slots] + np.hstack([shift, shift])
+        iou = bbox_iou_matrix(bboxes.astype(np.float64), predicted_boxes)
+        cost = 1.0 - iou
+        cost[self._class_conflict(classes[:, None], slots[None, :])] = np.inf
+
+        pairs = optimal_assignment(cost, 1.0 - self.min_iou)
+        if not pairs:
+            return empty, empty
+        det_idx, track_idx = np.array(pairs, dtype=np.intp).T
+        return det_idx, track_idx
+
+
+class UltralyticsBackend(TrackerBackend):
+    """ultralytics `model.track` (ByteTrack / BoT-SORT) writing into the shared track store"""
+
+    runs_detection = True
+
+    def __init__(self, store, model, tracker_config='bytetrack.yaml'):
+        super().__init__(store)
+        if model is None:
+            raise ValueError("UltralyticsBackend requires a loaded YOLO model")
+        # ultralytics me-register tracker (callback + predictor.trackers) sekali per model; model yang
+        # sudah melacak dengan config tracker lain tidak bisa dipakai ulang, jadi dimuat ulang
+        predictor = getattr(model, 'predictor', None)
+        if hasattr(predictor, 'trackers') and predictor.args.tracker != tracker_config:
+            model = type(model)(model.ckpt_path)
+        self.model = model
+        self.tracker_config = tracker_config
+        self.last_detections = []
+        self._reset_trackers()
+
+    def _reset_trackers(self):
+        """Reset the tracker state on the model's predictor (callbacks stay registered once)"""
+        predictor = getattr(self.model, 'predictor', None)
+        for tracker in getattr(predictor, 'trackers', ()):
+            tracker.reset()
+
+    def update(self, detections, now, frame=None):
+        store = self.store
+        self.frame_index += 1
+        results = self.model.track(frame, persist=True, tracker=self.tracker_config, verbose=False,
+                                   conf=MODEL_CONFIG['confidence_threshold'],
+                                   iou=MODEL_CONFIG['iou_threshold'], classes=VEHICLE_CLASSES)
+
+        ids = np.zeros(0, dtype=np.int64)
+        bboxes = np.zeros((0, 4), dtype=np.int32)
+        classes = np.zeros(0, dtype=np.int32)
+        confidences = np.zeros(0, dtype=np.float32)
+        boxes = results[0].boxes if results else None
+        if boxes is not None and boxes.id is not None:
+            ids = boxes.id.int().cpu().numpy().astype(np.int64)
+            bboxes = boxes.xyxy.float().cpu().numpy().astype(np.int32)
+            classes = boxes.cls.int().cpu().numpy().astype(np.int32)
+            confidences = boxes.conf.float().cpu().numpy().astype(np.float32)
+            size = bboxes[:, 2:] - bboxes[:, :2]
+            keep = np.all(size > TRACKING_CONFIG['min_detection_size'], axis=1)
+            ids, bboxes, classes, confidences = ids[keep], bboxes[keep], classes[keep], confidences[keep]
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) // 2
+
+        self.last_detections = [
+            {'bbox': b, 'class': c, 'confidence': p}
+            for b, c, p in zip(bboxes.tolist(), classes.tolist(), confidences.tolist())
+        ]
+
+        known = np.array([track_id in store.slot_of for track_id in ids.tolist()], dtype=bool)
+        slots = np.array([store.slot_of[track_id] for track_id in ids[known].tolist()], dtype=np.intp)
+        store.update_many(slots, centers[known], bboxes[known], classes[known], confidences[known],
+                          now, self.frame_index)
+        for i in np.flatnonzero(~known).tolist():
+            store.add(int(ids[i]), centers[i], bboxes[i], classes[i], confidences[i], now, self.frame_index)
+            self.next_id = max(self.next_id, int(ids[i]) + 1)
+
+        # Track yang tidak dilaporkan ultralytics dihapus dengan expiry yang sama seperti CentroidBackend
+        active = store.active_slots()
+        stale = active[self._expired(active, now)]
+        store.remove_slots(stale)
+
+    def reset(self):
+        super().reset()
+        self._reset_trackers()
+
+
+BACKENDS = {
+    'centroid': CentroidBackend,
+    'iou_kalman': IouKalmanBackend,
+    'bytetrack': UltralyticsBackend,
+    'botsort': UltralyticsBackend,
+}
+
+
+def create_backend(name, store, model=None, **options):
+    """Create a tracker backend by name (see BACKENDS)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown tracker backend '{name}', choose from {sorted(BACKENDS)}")
+    if name in ('bytetrack', 'botsort'):
+        return UltralyticsBackend(store, model, tracker_config=f'{name}.yaml')
+    return BACKENDS[name](store, **options)
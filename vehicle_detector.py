@@ -0,0 +1,243 @@
+"""
+YOLO vehicle detection dengan pilihan precision (fp32/bf16) untuk CPU
+
+Usage parity check bf16 vs fp32:
+    python vehicle_detector.py path/to/clip.mp4 --line 0,360,1280,360
+"""
+
+import argparse
+import sys
+from config import MODEL_CONFIG, VEHICLE_CLASSES, TRACKING_CONFIG, DEFAULT_LINE_SETTINGS
+
+SUPPORTED_PRECISIONS = ('fp32', 'bf16')
+
+
+def iter_clip_frames(clip_path, max_frames=None, with_timestamps=False):
+    """Yield frames from a recorded clip, optionally as (timestamp_seconds, frame)"""
+    import cv2
+
+    capture = cv2.VideoCapture(clip_path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    count = 0
+    try:
+        while max_frames is None or count < max_frames:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            # Timestamp dari posisi frame di video, bukan wall-clock
+            timestamp = count / fps
+            count += 1
+            yield (timestamp, frame) if with_timestamps else frame
+    finally:
+        capture.release()
+
+
+def bf16_supported():
+    """Check whether this CPU/torch build can run bf16 inference natively"""
+    try:
+        import torch
+    except ImportError:
+        return False
+
+    if not torch.backends.mkldnn.is_available():
+        return False
+
+    # Tanpa AVX512-BF16 / AMX, bf16 di-emulasi dan lebih lambat dari fp32
+    native = False
+    try:
+        native = bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        try:
+            with open('/proc/cpuinfo', 'r') as f:
+                flags = f.read()
+            native = 'avx512_bf16' in flags or 'amx_bf16' in flags
+        except OSError:
+            native = False
+    if not native:
+        return False
+
+    try:
+        conv = torch.nn.Conv2d(3, 8, 3)
+        with torch.no_grad(), torch.autocast('cpu', dtype=torch.bfloat16):
+            out = conv(torch.zeros(1, 3, 16, 16))
+        return out.dtype == torch.bfloat16
+    except RuntimeError:
+        return False
+
+
+def resolve_precision(precision):
+    """Return the precision that will actually be used, falling back to fp32"""
+    if precision not in SUPPORTED_PRECISIONS:
+        print(f"⚠️  Unknown precision '{precision}', using fp32")
+        return 'fp32'
+    if precision == 'bf16' and not bf16_supported():
+        print("⚠️  bf16 not supported on this CPU, falling back to fp32")
+        return 'fp32'
+    return precision
+
+
+def _to_float(output):
+    """Cast bf16 tensors in a (nested) model output back to fp32"""
+    import torch
+
+    if isinstance(output, torch.Tensor):
+        return output.float() if output.dtype == torch.bfloat16 else output
+    if isinstance(output, (list, tuple)):
+        return type(output)(_to_float(o) for o in output)
+    if isinstance(output, dict):
+        return {k: _to_float(v) for k, v in output.items()}
+    return output
+
+
+def _enable_bf16_forward(module):
+    """Run the network forward pass under bf16 autocast.
+
+    Pre-processing, NMS dan post-processing tetap fp32 karena output forward
+    di-cast kembali ke float sebelum keluar dari network.
+    """
+    import torch
+
+    forward = module.forward
+
+    def bf16_forward(*args, **kwargs):
+        with torch.autocast('cpu', dtype=torch.bfloat16):
+            output = forward(*args, **kwargs)
+        return _to_float(output)
+
+    module.forward = bf16_forward
+
+
+class VehicleDetector:
+    def __init__(self, model_path=None, precision=None):
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path or MODEL_CONFIG['model_path'])
+        self.precision = resolve_precision(precision or MODEL_CONFIG.get('precision', 'fp32'))
+        if self.precision == 'bf16':
+            _enable_bf16_forward(self.model.model)
+        print(f"🧮 Inference precision: {self.precision}")
+
+    def predict(self, frame):
+        """Run raw YOLO inference on a frame"""
+        return self.model(frame, verbose=False,
+                          conf=MODEL_CONFIG['confidence_threshold'],
+                          iou=MODEL_CONFIG['iou_threshold'])
+
+    def detect(self, frame, min_confidence=None):
+        """Detect vehicles in a frame and return detection dicts.
+
+        Default hanya deteksi di atas `detection_confidence`; two-stage tracking
+        memakai `min_confidence=MODEL_CONFIG['confidence_threshold']`.
+        """
+        if min_confidence is None:
+            min_confidence = MODEL_CONFIG['detection_confidence']
+        detections = []
+        for r in self.predict(frame):
+            boxes = r.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+
+            xyxy = boxes.xyxy.float().cpu().numpy()
+            classes = boxes.cls.int().cpu().numpy()
+            confidences = boxes.conf.float().cpu().numpy()
+
+            for (x1, y1, x2, y2), cls, conf in zip(xyxy, classes, confidences):
+                cls = int(cls)
+                conf = float(conf)
+                if cls in VEHICLE_CLASSES and conf > min_confidence:
+                    width = x2 - x1
+                    height = y2 - y1
+                    if width > TRACKING_CONFIG['min_detection_size'] and height > TRACKING_CONFIG['min_detection_size']:
+                        detections.append({
+                            'bbox': [int(x1), int(y1), int(x2), int(y2)],
+                            'class': cls,
+                            'confidence': conf
+                        })
+        return detections
+
+
+def _bbox_iou(a, b):
+    """IoU of two [x1, y1, x2, y2] boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """Count reference detections that have a same-class candidate with IoU >= threshold"""
+    matched = 0
+    used = set()
+    for ref in reference:
+        best_idx, best_iou = None, iou_threshold
+        for idx, cand in enumerate(candidate):
+            if idx in used or cand['class'] != ref['class']:
+                continue
+            iou = _bbox_iou(ref['bbox'], cand['bbox'])
+            if iou >= best_iou:
+                best_idx, best_iou = idx, iou
+        if best_idx is not None:
+            used.add(best_idx)
+            matched += 1
+    return matched
+
+
+def precision_parity(clip_path, counting_line, precision='bf16', max_frames=None, model_path=None):
+    """Compare detections and final directional counts of `precision` against fp32"""
+    from vehicle_tracker import VehicleTracker
+
+    reference = VehicleDetector(model_path, 'fp32')
+    candidate = VehicleDetector(model_path, precision)
+    if candidate.precision == 'fp32':
+        return None
+
+    trackers = {'fp32': VehicleTracker(model=reference.model), precision: VehicleTracker(model=candidate.model)}
+    total_ref = total_cand = total_matched = 0
+
+    for timestamp, frame in iter_clip_frames(clip_path, max_frames, with_timestamps=True):
+        ref_dets = reference.detect(frame, trackers['fp32'].min_confidence)
+        cand_dets = candidate.detect(frame, trackers[precision].min_confidence)
+        total_ref += len(ref_dets)
+        total_cand += len(cand_dets)
+        total_matched += match_detections(ref_dets, cand_dets)
+
+        for name, dets in (('fp32', ref_dets), (precision, cand_dets)):
+            trackers[name].update_tracking(dets, timestamp, frame)
+            trackers[name].check_line_crossings_directional(counting_line, DEFAULT_LINE_SETTINGS)
+
+    return {
+        'detections_fp32': total_ref,
+        f'detections_{precision}': total_cand,
+        'detection_recall': total_matched / total_ref if total_ref else 1.0,
+        'counts_fp32': trackers['fp32'].get_counts(),
+        f'counts_{precision}': trackers[precision].get_counts()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check reduced-precision parity against fp32 on a reference clip')
+    parser.add_argument('clip', help='Path to a reference video clip')
+    parser.add_argument('--line', required=True, help='Counting line as "x1,y1,x2,y2"')
+    parser.add_argument('--precision', default='bf16', choices=SUPPORTED_PRECISIONS)
+    parser.add_argument('--frames', type=int, help='Maximum number of frames')
+    parser.add_argument('--min-recall', type=float, default=0.95, help='Minimum detection recall vs fp32')
+    args = parser.parse_args()
+
+    x1, y1, x2, y2 = (int(v) for v in args.line.split(','))
+    report = precision_parity(args.clip, [(x1, y1), (x2, y2)], args.precision, args.frames)
+    if report is None:
+        print(f"⚠️  {args.precision} unavailable on this machine, nothing to compare")
+        return 0
+
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+
+    counts_match = report['counts_fp32'] == report[f'counts_{args.precision}']
+    recall_ok = report['detection_recall'] >= args.min_recall
+    print("✅ Parity OK" if counts_match and recall_ok else "❌ Parity FAILED")
+    return 0 if counts_match and recall_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
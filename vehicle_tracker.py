@@ -3,176 +3,524 @@ Vehicle tracking dan line crossing detection
 """
 
 import numpy as np
-import math
 import time
-from collections import defaultdict
-from config import TRACKING_CONFIG, CLASS_NAMES
+from collections import defaultdict, deque
+from config import TRACKING_CONFIG, CAMERA_MOTION_CONFIG, HEATMAP_CONFIG, CLASS_NAMES
+from track_store import TrackStore, RecentlyCounted
+from tracker_backends import create_backend
+from camera_motion import CameraMotionEstimator
+from line_geometry import LineSet, MAX_LINES
+from zones import ZoneMap, ZoneCounter
+from lanes import LaneMonitor
+from od_matrix import ODMatrix
+from speed_estimation import SpeedEstimator
+from crossing_events import EventRing
+from count_dedup import CountDeduplicator
+from heatmap import TrajectoryHeatmap
+from line_suggestion import suggest_counting_lines
 
 class VehicleTracker:
-    def __init__(self):
-        self.tracked_vehicles = {}
-        self.next_id = 0
-        self.counted_ids = set()
+    def __init__(self, backend=None, model=None, camera_motion=None, **backend_options):
+        self.tracked_vehicles = TrackStore()
+        self.backend = create_backend(backend or TRACKING_CONFIG['backend'], self.tracked_vehicles,
+                                      model=model, **backend_options)
+        # Status counted ada di track store; ini hanya guard re-count yang terbatas ukurannya
+        self.recently_counted = RecentlyCounted()
+        self.last_timestamp = 0.0
         
-        # Directional counting
+        # Camera motion compensation: offset kumulatif, per line dicatat offset saat digambar
+        use_camera_motion = CAMERA_MOTION_CONFIG['enabled'] if camera_motion is None else camera_motion
+        self.camera_motion = CameraMotionEstimator() if use_camera_motion else None
+        self.camera_offset = np.zeros(2, dtype=np.int32)
+        self._line_offsets = {}
+        # Segment path selama counting di-pause, dicek sekali saat counting jalan lagi
+        self._paused_segments = 0
+        
+        # Counting lines: bit counted-state per nama line, geometry di-cache
+        self._line_bits = {}
+        self._line_set = None
+        self._lines = []
+        
+        # Geometry baru (lines / zones) dibangun di thread pemanggil lalu di-apply
+        # di detection thread pada awal frame (copy-on-write, tanpa stop capture)
+        self._geometry_updates = deque()
+        self._published_line_bits = {}
+        # Jumlah reset_counts yang sudah di-apply detection thread (GUI refresh label saat berubah)
+        self.resets_applied = 0
+        
+        # Directional counting (total semua line + per line)
         self.vehicle_count_up = defaultdict(int)
         self.vehicle_count_down = defaultdict(int)
         self.total_count_up = 0
         self.total_count_down = 0
+        self.line_counts = {}
+        # Crossing event terstruktur untuk sink (database, export), dibaca lewat cursor
+        self.crossing_events = EventRing()
+        # Total count dihitung sekali per kendaraan walau melewati beberapa line / region;
+        # multi-region: share satu CountDeduplicator lewat share_count_dedup (None = tanpa dedup)
+        self.count_dedup = CountDeduplicator() if TRACKING_CONFIG['count_dedup'] else None
+        self.count_source = 'main'
+        self._source_origin = np.zeros(2)
+        self.duplicate_count = 0
         
-    def update_tracking(self, detections):
-        """Update vehicle tracking with improved algorithm"""
-        max_distance = TRACKING_CONFIG['max_distance']
-        updated_tracks = {}
+        # Polygon zones (enter / exit / dwell), dibuat lewat set_zones
+        self.zones = None
+        self.od_matrix = None
+        self._zone_offset = np.zeros(2, dtype=np.int32)
         
-        for detection in detections:
-            bbox = detection['bbox']
-            center = [(bbox[0] + bbox[2]) // 2, (bbox[1] + bbox[3]) // 2]
-            
-            best_match = None
-            best_distance = max_distance
-            
-            for track_id, track in self.tracked_vehicles.items():
-                if track['class'] == detection['class']:
-                    # Calculate distance
-                    distance = math.sqrt(
-                        (center[0] - track['center'][0])**2 + 
-                        (center[1] - track['center'][1])**2
-                    )
-                    
-                    # Add velocity prediction for better tracking
-                    if len(track['path']) >= 2:
-                        last_movement = [
-                            track['path'][-1][0] - track['path'][-2][0],
-                            track['path'][-1][1] - track['path'][-2][1]
-                        ]
-                        predicted_pos = [
-                            track['center'][0] + last_movement[0],
-                            track['center'][1] + last_movement[1]
-                        ]
-                        predicted_distance = math.sqrt(
-                            (center[0] - predicted_pos[0])**2 + 
-                            (center[1] - predicted_pos[1])**2
-                        )
-                        distance = min(distance, predicted_distance)
-                    
-                    if distance < best_distance:
-                        best_distance = distance
-                        best_match = track_id
-            
-            if best_match is not None:
-                path_history = self.tracked_vehicles[best_match]['path']
-                if len(path_history) > TRACKING_CONFIG['path_history_length']:
-                    path_history = path_history[-TRACKING_CONFIG['path_history_length']:]
-                    
-                updated_tracks[best_match] = {
-                    'center': center,
-                    'bbox': bbox,
-                    'class': detection['class'],
-                    'last_seen': time.time(),
-                    'path': path_history + [center],
-                    'confidence': detection['confidence'],
-                    'is_counted': best_match in self.counted_ids  # Add counted status
-                }
+        # Queue length / occupancy per lajur, dibuat lewat set_lanes
+        self.lanes = None
+        self._lane_offset = np.zeros(2, dtype=np.int32)
+        
+        # Speed estimation dari kalibrasi SPEED_CONFIG (None jika belum dikalibrasi)
+        self.speed_estimator = SpeedEstimator.from_config()
+        self._speed_offset = np.zeros(2, dtype=np.int32)
+        
+        # Trajectory heatmap / flow field, dibuat lewat set_heatmap
+        self.heatmap = None
+        self._heatmap_offset = np.zeros(2, dtype=np.int32)
+        
+    def update_tracking(self, detections, timestamp=None, frame=None):
+        """Update vehicle tracking through the configured backend.
+
+        `timestamp` adalah waktu frame dalam detik (misal posisi frame di video).
+        Tanpa timestamp dipakai wall-clock, cocok untuk capture live.
+        `frame` diperlukan untuk re-ID dan backend ultralytics.
+        """
+        now = time.time() if timestamp is None else timestamp
+        self.last_timestamp = now
+        self.apply_geometry()
+        if frame is not None:
+            self.backend.frame_size = (frame.shape[1], frame.shape[0])
+        if self.camera_motion is not None and frame is not None:
+            self._compensate_camera_motion(frame)
+        self.backend.update(detections, now, frame)
+        self.recently_counted.prune(now)
+        self._move_reclassified_counts()
+
+    def _move_reclassified_counts(self):
+        """Move the counts of tracks whose voted class changed after they were counted.
+
+        Kendaraan tetap dihitung sekali (counted state dan dedup tidak
+        berubah); count per line dan total dipindah dari class lama ke class
+        baru, sehingga jumlah total tetap sama.
+        """
+        store = self.tracked_vehicles
+        slots = store.active_slots()
+        recorded = (((store.counted_up[slots] | store.counted_down[slots]) != 0) |
+                    (store.totals_up[slots] + store.totals_down[slots] > 0))
+        slots = slots[recorded & (store.counted_class[slots] != store.classes[slots])]
+        if len(slots) == 0:
+            return
+        line_names = {1 << bit: name for name, bit in self._line_bits.items()}
+        for slot in slots.tolist():
+            old = CLASS_NAMES.get(int(store.counted_class[slot]), 'unknown')
+            new = CLASS_NAMES.get(int(store.classes[slot]), 'unknown')
+            for key, lines in (('up', int(store.counted_up[slot])), ('down', int(store.counted_down[slot]))):
+                for bit, name in line_names.items():
+                    if lines & bit and name in self.line_counts:
+                        self._move_count(self.line_counts[name][key], old, new)
+            for counts, total in ((self.vehicle_count_up, store.totals_up[slot]),
+                                  (self.vehicle_count_down, store.totals_down[slot])):
+                for _ in range(int(total)):
+                    self._move_count(counts, old, new)
+            store.counted_class[slot] = store.classes[slot]
+
+    @staticmethod
+    def _move_count(counts, old, new):
+        counts[old] -= 1
+        if counts[old] <= 0:
+            del counts[old]
+        counts[new] += 1
+
+    def set_frame_size(self, frame_size):
+        """Frame (width, height) for expiring tracks predicted outside the frame, when no frames are passed"""
+        self.backend.frame_size = tuple(frame_size) if frame_size is not None else None
+
+    def _compensate_camera_motion(self, frame):
+        """Move tracks (and the counting line offset) with the global camera shift"""
+        shift = self.camera_motion.estimate(frame)
+        if self.camera_motion.moving:
+            self._paused_segments += 1
+        if not shift.any():
+            return
+        store = self.tracked_vehicles
+        store.translate(store.active_slots(), shift)
+        self.backend.compensate(shift)
+        self.camera_offset += shift
+
+    @property
+    def camera_moving(self):
+        """True while the camera pans/zooms (counting is paused)"""
+        return self.camera_motion is not None and self.camera_motion.moving
+
+    def compensated_line(self, counting_line, name='main'):
+        """Counting line shifted with the camera since it was drawn"""
+        if not counting_line or self.camera_motion is None:
+            return counting_line
+        key = tuple(tuple(p) for p in counting_line)
+        entry = self._line_offsets.get(name)
+        if entry is None or entry[0] != key:
+            # Line baru digambar pada frame sekarang, offset dihitung dari sini
+            entry = self._line_offsets[name] = (key, self.camera_offset.copy())
+        dx, dy = (self.camera_offset - entry[1]).tolist()
+        return [(x + dx, y + dy) for x, y in counting_line]
+
+    @property
+    def min_confidence(self):
+        """Minimum confidence the detector should keep for this backend"""
+        return self.backend.min_confidence
+
+    @property
+    def next_id(self):
+        return self.backend.next_id
+
+    def _line_set_for(self, lines):
+        """Stacked geometry of the (compensated) lines, rebuilt only when a line changes"""
+        for line in lines:
+            if line['name'] not in self._line_bits:
+                self._line_bits[line['name']] = self._free_line_bit(self._line_bits)
+        compensated = [dict(line, points=self.compensated_line(line['points'], line['name'])) for line in lines]
+        if self._line_set is None or self._line_set.key != LineSet.make_key(compensated):
+            self._line_set = LineSet(compensated, self._line_bits)
+        return self._line_set
+
+    @staticmethod
+    def _free_line_bit(line_bits):
+        used = set(line_bits.values())
+        bit = next((b for b in range(MAX_LINES) if b not in used), None)
+        if bit is None:
+            raise ValueError(f"At most {MAX_LINES} counting lines are supported")
+        return bit
+
+    def set_counting_lines(self, lines, carry_counts=True):
+        """Publish a new set of named counting lines while detection keeps running.
+
+        Bit counted-state dibangun di thread pemanggil; kompensasi camera dan
+        LineSet dibuat di detection thread di awal frame berikutnya (offset
+        camera hanya diubah thread itu). Dengan
+        carry_counts, count per line yang namanya tetap ada dipertahankan;
+        tanpa itu line tersebut mulai dari nol dan track boleh dihitung lagi.
+        """
+        lines = [dict(line) for line in lines]
+        names = {line['name'] for line in lines}
+        previous = self._published_line_bits
+        bits = {name: bit for name, bit in previous.items() if name in names and carry_counts}
+        # Bit line yang dihapus (atau di-reset) dibersihkan dari counted state sebelum dipakai ulang
+        released = 0
+        for name, bit in previous.items():
+            if name not in bits:
+                released |= 1 << bit
+        for line in lines:
+            if line['name'] not in bits:
+                bits[line['name']] = self._free_line_bit(bits)
+        self._published_line_bits = bits
+        self._geometry_updates.append({
+            'lines': lines,
+            'line_bits': bits,
+            'released': released,
+            'carry_counts': carry_counts
+        })
+
+    def share_count_dedup(self, count_dedup, source, origin=(0, 0)):
+        """Deduplicate totals with other trackers (adjacent / overlapping capture regions).
+
+        `source` harus unik per tracker; `origin` = posisi kiri atas region
+        dalam koordinat bersama (mis. koordinat layar capture region).
+        `count_dedup` None mematikan dedup total untuk tracker ini.
+        """
+        self.count_dedup = count_dedup
+        self.count_source = source
+        self._source_origin = np.asarray(origin, dtype=np.float64)
+
+    def apply_geometry(self):
+        """Swap in published lines / zones and queued resets; called by the detection thread between frames"""
+        while self._geometry_updates:
+            update = self._geometry_updates.popleft()
+            if 'lines' in update:
+                self._apply_lines(update)
+            elif 'reset' in update:
+                self._reset_counts()
             else:
-                updated_tracks[self.next_id] = {
-                    'center': center,
-                    'bbox': bbox,
-                    'class': detection['class'],
-                    'last_seen': time.time(),
-                    'path': [center],
-                    'confidence': detection['confidence'],
-                    'is_counted': False  # New vehicles are not counted yet
-                }
-                self.next_id += 1
-                
-        # Remove old tracks
-        current_time = time.time()
-        self.tracked_vehicles = {
-            tid: track for tid, track in updated_tracks.items() 
-            if current_time - track['last_seen'] < TRACKING_CONFIG['track_timeout']
-        }
+                self._apply_zones(update)
+
+    def _apply_lines(self, update):
+        released = update['released']
+        if released:
+            store = self.tracked_vehicles
+            store.counted_lines &= ~released
+            store.counted_up &= ~released
+            store.counted_down &= ~released
+            store.counted &= store.counted_lines != 0
+            self.recently_counted.clear_lines(released)
+        keep = update['line_bits'] if update['carry_counts'] else {}
+        self.line_counts = {name: counts for name, counts in self.line_counts.items() if name in keep}
+        self._line_bits = dict(update['line_bits'])
+        self._lines = update['lines']
+        # Offset line baru dicatat pada frame ini (di detection thread), lihat compensated_line
+        self._line_set = self._line_set_for(self._lines) if self._lines else None
 
     def check_line_crossings_directional(self, counting_line, line_settings):
-        """Check for line crossings with direction detection"""
+        """Check for line crossings with direction detection (single line)"""
         if not counting_line:
             return False
-            
-        threshold = line_settings['detection_threshold']
-        line_p1 = np.array(counting_line[0])
-        line_p2 = np.array(counting_line[1])
-        count_updated = False
+        return self.check_line_crossings([{'name': 'main', 'points': counting_line, 'settings': line_settings}])
+
+    def check_line_crossings(self, lines=None):
+        """Check all named lines for crossings in one batched pass over all tracks.
+
+        `lines` adalah list dict {'name', 'points', 'settings'}; setiap line
+        punya counter up/down sendiri dan counted state per (track, line).
+        Tanpa `lines` dipakai line yang di-publish lewat set_counting_lines.
+        """
+        if lines is None:
+            lines = self._lines
+        if not lines or self.camera_moving:
+            return False
+        # Path sudah dikompensasi, jadi segment selama camera move bisa dicek sekarang
+        segments = min(2 + self._paused_segments, self.tracked_vehicles.path_capacity - 1)
+        self._paused_segments = 0
+        line_set = self._line_set_for(lines)
+        
+        store = self.tracked_vehicles
+        slots = np.fromiter(store.slot_of.values(), dtype=np.intp, count=len(store.slot_of))
+        slots = slots[store.path_len[slots] >= 3]
+        counted = store.counted_lines[slots]
+        if len(slots) and len(self.recently_counted):
+            counted = counted | self.recently_counted.line_masks(store.ids[slots])
+        open_lines = (counted[:, None] & line_set.bits[None, :]) == 0
+        keep = open_lines.any(axis=1)
+        slots, open_lines = slots[keep], open_lines[keep]
+        if len(slots) == 0:
+            return False
+        
+        # Segment = deteksi sebelumnya -> deteksi ini; titik prediksi (coast) di antaranya dilewati,
+        # sehingga crossing hanya dihitung jika titik akhirnya benar-benar terdeteksi
+        window = min(segments + 1 + TRACKING_CONFIG['coast_frames'], store.path_capacity)
+        detected = store.last_detected(slots, window)
+        detected &= np.arange(window)[None, :] >= (window - store.path_len[slots])[:, None]
+        previous = np.maximum.accumulate(np.where(detected, np.arange(window), -1), axis=1)
+        ends = np.arange(window - segments, window)
+        start_idx = previous[:, ends - 1]
+        valid = detected[:, ends] & (start_idx >= 0)
+        rows_idx = np.arange(len(slots))[:, None]
+        path = store.last_points(slots, window).astype(np.int64)
+        path_times = store.last_times(slots, window)
+        start_idx = np.maximum(start_idx, 0)
+        starts, points_end = path[rows_idx, start_idx], path[:, ends]
+        start_times, end_times = path_times[rows_idx, start_idx], path_times[:, ends]
         
-        for track_id, track in list(self.tracked_vehicles.items()):
-            if track_id in self.counted_ids:
-                continue
-                
-            if len(track['path']) < 3:
-                continue
-                
-            # Check multiple recent positions for more robust detection
-            for i in range(len(track['path']) - 1, max(0, len(track['path']) - 3), -1):
-                if i == 0:
-                    break
-                
-                current_pos = np.array(track['path'][i])
-                prev_pos = np.array(track['path'][i-1])
-                
-                # Calculate cross products to detect line crossing
-                vec_p1_current = current_pos - line_p1
-                vec_p1_prev = prev_pos - line_p1
-                vec_line = line_p2 - line_p1
-                
-                cross_product_current = np.cross(vec_line, vec_p1_current)
-                cross_product_prev = np.cross(vec_line, vec_p1_prev)
-                
-                # Check if vehicle crossed the line
-                if cross_product_current * cross_product_prev < 0:
-                    # Calculate distance to line
-                    line_len_sq = np.sum((line_p2 - line_p1)**2)
-                    if line_len_sq == 0:
-                        dist_to_line = np.linalg.norm(current_pos - line_p1)
-                    else:
-                        t = max(0, min(1, np.dot(current_pos - line_p1, line_p2 - line_p1) / line_len_sq))
-                        projection = line_p1 + t * (line_p2 - line_p1)
-                        dist_to_line = np.linalg.norm(current_pos - projection)
-                    
-                    if dist_to_line < threshold:
-                        vehicle_type = CLASS_NAMES.get(track['class'], 'unknown')
-                        
-                        if cross_product_current > 0:
-                            direction = "UP"
-                            self.vehicle_count_up[vehicle_type] += 1
-                            self.total_count_up += 1
-                        else:
-                            direction = "DOWN"
-                            self.vehicle_count_down[vehicle_type] += 1
-                            self.total_count_down += 1
-                        
-                        self.counted_ids.add(track_id)
-                        # Mark this track as counted
-                        if track_id in self.tracked_vehicles:
-                            self.tracked_vehicles[track_id]['is_counted'] = True
-                        
-                        print(f"Vehicle {track_id} ({vehicle_type}) *COUNTED* going {direction}!")
-                        count_updated = True
-                        break
+        # Semua segment terakhir x semua line sekaligus: (tracks, segments, lines), oldest first
+        crossed, side = line_set.crossings(starts, points_end)
+        crossed &= valid[:, :, None]
+        crossed &= open_lines[:, None, :]
+        rows, line_idx = np.nonzero(crossed.any(axis=1))
+        if len(rows) == 0:
+            return False
+        # Segment crossing terbaru per (track, line)
+        newest = segments - 1 - np.argmax(crossed[rows, ::-1, line_idx], axis=1)
         
-        return count_updated
+        for row, n, segment in zip(rows.tolist(), line_idx.tolist(), newest.tolist()):
+            slot = slots[row]
+            track_id = int(store.ids[slot])
+            name = line_set.names[n]
+            vehicle_type = CLASS_NAMES.get(int(store.classes[slot]), 'unknown')
+            line_counts = self.line_counts.setdefault(name, {
+                'up': defaultdict(int), 'down': defaultdict(int), 'total_up': 0, 'total_down': 0
+            })
+            
+            # Posisi dan waktu crossing diinterpolasi dari parameter segment (side berubah linear)
+            start, end = starts[row, segment], points_end[row, segment]
+            side_start = float(line_set.side(start)[n])
+            fraction = side_start / (side_start - float(side[row, segment, n]))
+            t_start, t_end = start_times[row, segment], end_times[row, segment]
+            crossing_time = float(t_start + fraction * (t_end - t_start))
+            position = (float(start[0] + fraction * (end[0] - start[0])),
+                        float(start[1] + fraction * (end[1] - start[1])))
+            # Count per line selalu bertambah; total hanya untuk crossing pertama kendaraan ini
+            new = self.count_dedup is None or self.count_dedup.is_new(
+                self.count_source, track_id, name, crossing_time, self._source_origin + position)
+            
+            if side[row, segment, n] > 0:
+                direction = "UP"
+                line_counts['up'][vehicle_type] += 1
+                line_counts['total_up'] += 1
+                if new:
+                    self.vehicle_count_up[vehicle_type] += 1
+                    self.total_count_up += 1
+            else:
+                direction = "DOWN"
+                line_counts['down'][vehicle_type] += 1
+                line_counts['total_down'] += 1
+                if new:
+                    self.vehicle_count_down[vehicle_type] += 1
+                    self.total_count_down += 1
+            if not new:
+                self.duplicate_count += 1
+            
+            # Mark this track as counted on this line
+            bit = int(line_set.bits[n])
+            store.mark_counted(track_id, bit)
+            store.record_count(slot, bit, direction == "UP", new)
+            self.recently_counted.add(track_id, self.last_timestamp, bit)
+            
+            self.crossing_events.append({
+                'track_id': track_id,
+                'class': vehicle_type,
+                'direction': direction,
+                'line': name,
+                'timestamp': self.last_timestamp,
+                'crossing_time': crossing_time,
+                'position': position,
+                'duplicate': not new
+            })
+            
+            print(f"Vehicle {track_id} ({vehicle_type}) *COUNTED* going {direction} at {name}"
+                  f"{' (duplicate, not in total)' if not new else ''}!")
+        
+        return True
+
+    def set_zones(self, zones, frame_size, carry_counts=True):
+        """Publish zone polygons for a frame size (width, height); empty list disables zones.
+
+        Raster dibuat di thread pemanggil, counter baru dipasang di awal frame
+        berikutnya; count zone dengan nama yang sama dibawa jika carry_counts.
+        """
+        self._geometry_updates.append({
+            'zone_map': ZoneMap(zones, frame_size) if zones else None,
+            'offset': self.camera_offset.copy(),
+            'carry_counts': carry_counts
+        })
+
+    def _apply_zones(self, update):
+        zone_map = update['zone_map']
+        if zone_map is None:
+            self.zones = self.od_matrix = None
+            return
+        zones = ZoneCounter(zone_map=zone_map)
+        carry = update['carry_counts'] and self.zones is not None
+        if carry:
+            zones.carry_counts(self.zones)
+        if not carry or self.od_matrix is None or self.od_matrix.zone_names != zones.names:
+            self.od_matrix = ODMatrix(zones.names)
+        self.zones = zones
+        self._zone_offset = update['offset']
+
+    def check_zones(self):
+        """Update zone membership of all tracks, returns this frame's enter/exit/complete events"""
+        if self.zones is None or self.camera_moving:
+            return []
+        events = self.zones.update(self.tracked_vehicles, self.last_timestamp, self.camera_offset - self._zone_offset)
+        # Bucket ditutup dulu; trip yang selesai sebelum batas bucket masuk ke bucket
+        # yang sudah ditutup sesuai timestamp event (waktu track terakhir terlihat)
+        self.od_matrix.roll(self.last_timestamp, self.get_counts)
+        self.od_matrix.add_events(events)
+        return events
+
+    def set_lanes(self, lanes, frame_size):
+        """Rasterize lane polygons for a frame size (width, height); empty list disables lanes.
+
+        Dengan speed calibration homography, queue length dihitung dalam meter.
+        """
+        estimator = self.speed_estimator
+        homography = estimator.homography if estimator is not None else None
+        self.lanes = LaneMonitor(lanes, frame_size, homography=homography) if lanes else None
+        self._lane_offset = self.camera_offset.copy()
+
+    def check_lanes(self):
+        """Update lane occupancy / queue length, returns a time-series sample when one is due"""
+        if self.lanes is None or self.camera_moving:
+            return None
+        return self.lanes.update(self.tracked_vehicles, self.last_timestamp, self.camera_offset - self._lane_offset)
+
+    def set_speed_calibration(self, estimator):
+        """Use a SpeedEstimator (or None to disable), calibrated in the current camera view"""
+        self.speed_estimator = estimator
+        self._speed_offset = self.camera_offset.copy()
+
+    def check_speeds(self):
+        """Update speeds of all tracks, returns this frame's samples [(track_id, class, km/h)]"""
+        if self.speed_estimator is None or self.camera_moving:
+            return []
+        return self.speed_estimator.update(self.tracked_vehicles, self.last_timestamp,
+                                           self.camera_offset - self._speed_offset)
+
+    def track_speed(self, track_id):
+        """Current speed of a track in km/h, None if not measured yet"""
+        if self.speed_estimator is None or track_id not in self.tracked_vehicles.slot_of:
+            return None
+        slot = self.tracked_vehicles.slot_of[track_id]
+        if slot >= self.speed_estimator.capacity or self.speed_estimator.slot_ids[slot] != track_id:
+            return None
+        speed = float(self.speed_estimator.speed[slot])
+        return None if np.isnan(speed) else speed
+
+    def set_heatmap(self, frame_size):
+        """Start a trajectory heatmap for a frame size (width, height), None disables it"""
+        enabled = frame_size is not None and HEATMAP_CONFIG['enabled']
+        self.heatmap = TrajectoryHeatmap(frame_size) if enabled else None
+        self._heatmap_offset = self.camera_offset.copy()
+
+    def check_heatmap(self):
+        """Accumulate this frame's track segments into the heatmap"""
+        if self.heatmap is None or self.camera_moving:
+            return
+        self.heatmap.update(self.tracked_vehicles, self.last_timestamp, self.camera_offset - self._heatmap_offset)
+
+    def suggest_counting_lines(self, max_lines=None):
+        """Counting lines suggested from the heatmap flow field, in current frame coordinates"""
+        if self.heatmap is None:
+            return []
+        suggestions = suggest_counting_lines(self.heatmap, max_lines)
+        dx, dy = (int(v) for v in self.camera_offset - self._heatmap_offset)
+        for suggestion in suggestions:
+            suggestion['points'] = [(x + dx, y + dy) for x, y in suggestion['points']]
+        return suggestions
 
     def get_tracked_vehicles_with_status(self):
         """Get tracked vehicles with their counted status"""
         return self.tracked_vehicles
 
     def reset_counts(self):
-        """Reset all vehicle counts"""
+        """Reset all vehicle counts at the start of the next frame.
+
+        Reset mengalokasi ulang track store, jadi tidak boleh berjalan di
+        tengah update detection thread; di-queue seperti geometry update.
+        Tanpa detection thread yang berjalan, panggil apply_geometry langsung.
+        """
+        self._geometry_updates.append({'reset': True})
+
+    def _reset_counts(self):
         self.vehicle_count_up = defaultdict(int)
         self.vehicle_count_down = defaultdict(int)
         self.total_count_up = 0
         self.total_count_down = 0
-        self.counted_ids = set()
-        self.tracked_vehicles = {}
-        self.next_id = 0
+        self.line_counts = {}
+        self.recently_counted.clear()
+        if self.count_dedup is not None:
+            self.count_dedup.clear()
+        self.duplicate_count = 0
+        self.tracked_vehicles.clear()
+        if self.zones is not None:
+            self.zones.reset()
+            self.od_matrix.reset()
+        if self.speed_estimator is not None:
+            self.speed_estimator.reset()
+        if self.lanes is not None:
+            self.lanes.reset()
+        if self.heatmap is not None:
+            self.heatmap.reset()
+        self.backend.reset()
+        if self.camera_motion is not None:
+            self.camera_motion.reset()
+            self.camera_offset[:] = 0
+            self._zone_offset[:] = 0
+            self._speed_offset[:] = 0
+            self._lane_offset[:] = 0
+            self._heatmap_offset[:] = 0
+            self._line_offsets.clear()
+            self._paused_segments = 0
+        self.resets_applied += 1
 
     def get_counts(self):
         """Get current counts"""
@@ -180,5 +528,18 @@ class VehicleTracker:
             'up': dict(self.vehicle_count_up),
             'down': dict(self.vehicle_count_down),
             'total_up': self.total_count_up,
-            'total_down': self.total_count_down
+            'total_down': self.total_count_down,
+            'duplicates': self.duplicate_count,
+            'lines': {
+                name: {
+                    'up': dict(counts['up']),
+                    'down': dict(counts['down']),
+                    'total_up': counts['total_up'],
+                    'total_down': counts['total_down']
+                }
+                for name, counts in self.line_counts.items()
+            },
+            'zones': self.zones.get_counts() if self.zones is not None else {},
+            'speeds': self.speed_estimator.stats.summary() if self.speed_estimator is not None else {},
+            'queues': self.lanes.get_state() if self.lanes is not None else {}
         }
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Polygon zone counting (enter / exit / dwell) dengan raster label map
+"""
+
+import numpy as np
+from config import ZONE_CONFIG
+from track_store import SlotState
+
+MAX_ZONES = 63
+
+
+def rasterize_polygon(points, shape, scale=1):
+    """Boolean mask of the pixels whose centers lie inside a polygon (even-odd rule).
+
+    `shape` adalah (height, width) raster; koordinat polygon dalam pixel frame,
+    satu pixel raster = scale x scale pixel frame.
+    """
+    polygon = np.asarray(points, dtype=np.float64) / scale
+    ys = np.arange(shape[0], dtype=np.float64)[:, None] + 0.5
+    xs = np.arange(shape[1], dtype=np.float64)[None, :] + 0.5
+    inside = np.zeros(shape, dtype=bool)
+    for (x1, y1), (x2, y2) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        if y1 == y2:
+            continue
+        # Edge memotong scanline y; x potongan dihitung per baris sekali saja
+        spans = (y1 > ys) != (y2 > ys)
+        x_cross = x1 + (ys - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= spans & (xs < x_cross)
+    return inside
+
+
+class ZoneMap:
+    """Zone polygons rasterized once into a per-pixel bitmask (bit per zone).
+
+    Membership semua track = satu fancy-index lookup pada label map; zone
+    boleh overlap karena setiap zone punya bit sendiri.
+    """
+
+    def __init__(self, zones, frame_size, scale=None):
+        if len(zones) > MAX_ZONES:
+            raise ValueError(f"At most {MAX_ZONES} zones are supported")
+        self.names = [zone['name'] for zone in zones]
+        self.scale = scale or ZONE_CONFIG['raster_scale']
+        width, height = frame_size
+        self.shape = (-(-height // self.scale), -(-width // self.scale))
+        dtype = next(t for t in (np.uint8, np.uint16, np.uint32, np.uint64) if np.iinfo(t).bits >= len(zones))
+        self.labels = np.zeros(self.shape, dtype=dtype)
+        for i, zone in enumerate(zones):
+            self.labels[rasterize_polygon(zone['points'], self.shape, self.scale)] |= dtype(1 << i)
+        self.bits = np.array([1 << i for i in range(len(zones))], dtype=np.int64)
+
+    def lookup(self, points):
+        """Zone bitmask of each point; points outside the frame get 0"""
+        cells = np.asarray(points, dtype=np.int64) // self.scale
+        inside = ((cells[:, 0] >= 0) & (cells[:, 0] < self.shape[1])
+                  & (cells[:, 1] >= 0) & (cells[:, 1] < self.shape[0]))
+        masks = np.zeros(len(cells), dtype=np.int64)
+        masks[inside] = self.labels[cells[inside, 1], cells[inside, 0]]
+        return masks
+
+
+class ZoneCounter(SlotState):
+    """Per-frame zone occupancy plus enter/exit/dwell events for all tracks.
+
+    State membership disimpan per slot TrackStore; track yang expire di dalam
+    zone menghasilkan event 'lost' (dihitung sebagai exit) pada frame berikutnya.
+    Update pertama hanya mencatat track yang sudah berada di dalam zone (tanpa
+    event enter), sehingga zone bisa diganti saat tracking berjalan.
+    """
+
+    def __init__(self, zones=None, frame_size=None, scale=None, zone_map=None):
+        self.zone_map = zone_map or ZoneMap(zones, frame_size, scale)
+        self.names = self.zone_map.names
+        n = len(self.names)
+        # first_zone / last_zone: zone pertama dan terakhir yang dimasuki track (untuk OD matrix),
+        # -1 = belum ada; left_origin: track sudah masuk zone lain dari zone asal (baru dianggap trip OD)
+        super().__init__(slot_last_seen=(np.float64, 0.0, ()), first_zone=(np.int32, -1, ()),
+                         last_zone=(np.int32, -1, ()), left_origin=(bool, False, ()),
+                         membership=(np.int64, 0, ()), entered_at=(np.float64, 0.0, (n,)))
+        self.occupancy = np.zeros(n, dtype=np.int64)
+        self.entered = np.zeros(n, dtype=np.int64)
+        self.exited = np.zeros(n, dtype=np.int64)
+        self.dwell_total = np.zeros(n, dtype=np.float64)
+        self._primed = False
+
+    def update(self, store, timestamp, offset=(0, 0)):
+        """Update membership of every track and return this frame's events.
+
+        `offset` adalah pergeseran camera sejak zone digambar (lihat
+        camera-motion compensation); lookup dilakukan di koordinat zone.
+        """
+        self._ensure_capacity(store.capacity)
+        active = store.active
+        slots = np.flatnonzero(active)
+        current = np.zeros(self.capacity, dtype=np.int64)
+        current[slots] = self.zone_map.lookup(store.centers[slots] - np.asarray(offset))
+        if not self._primed:
+            self._prime(store, current, timestamp)
+            return []
+
+        # Slot kosong atau sudah dipakai track lain: track lama selesai
+        ended = self._ended(store)
+        replaced = ended & (self.membership != 0)
+        previous = np.where(replaced, 0, self.membership)
+        # Track yang hilang keluar pada waktu terakhir terlihat, bukan saat timeout
+        events = self._exits(np.where(replaced, self.membership, 0), self.slot_last_seen, 'lost')
+        events += self._exits(previous & ~current, np.full(self.capacity, timestamp), 'exit')
+        events += self._completions(ended)
+
+        enter = current & ~previous
+        for slot in np.flatnonzero(enter).tolist():
+            for z in np.flatnonzero(enter[slot] & self.zone_map.bits).tolist():
+                if self.first_zone[slot] < 0:
+                    self.first_zone[slot] = z
+                elif z != self.first_zone[slot]:
+                    self.left_origin[slot] = True
+                self.last_zone[slot] = z
+                self.entered_at[slot, z] = timestamp
+                self.entered[z] += 1
+                events.append({'zone': self.names[z], 'event': 'enter', 'track_id': int(store.ids[slot]),
+                               'class': int(store.classes[slot]), 'timestamp': timestamp})
+
+        self.membership = current
+        self._record(store)
+        self.occupancy = ((current[:, None] & self.zone_map.bits[None, :]) != 0).sum(axis=0)
+        return events
+
+    def _prime(self, store, current, timestamp):
+        """Take over tracks already inside a zone without enter events"""
+        self._primed = True
+        inside = np.flatnonzero(current)
+        # Zone asal = zone (bit terendah) tempat track berada saat zone dipasang
+        lowest = np.log2(current[inside] & -current[inside]).astype(np.int32)
+        self.first_zone[inside] = lowest
+        self.last_zone[inside] = lowest
+        self.entered_at[inside] = timestamp
+        self.membership = current
+        self._record(store)
+        self.occupancy = ((current[:, None] & self.zone_map.bits[None, :]) != 0).sum(axis=0)
+
+    def _record(self, store):
+        super()._record(store)
+        self.slot_last_seen = store.last_seen.copy()
+
+    def carry_counts(self, other):
+        """Copy enter/exit/dwell totals of zones with the same name from another counter"""
+        index = {name: z for z, name in enumerate(other.names)}
+        for z, name in enumerate(self.names):
+            if name in index:
+                self.entered[z] = other.entered[index[name]]
+                self.exited[z] = other.exited[index[name]]
+                self.dwell_total[z] = other.dwell_total[index[name]]
+
+    def _exits(self, masks, exit_times, event):
+        """Exit events (with dwell time) for the zone bits set in masks"""
+        events = []
+        for slot in np.flatnonzero(masks).tolist():
+            timestamp = float(exit_times[slot])
+            for z in np.flatnonzero(masks[slot] & self.zone_map.bits).tolist():
+                dwell = max(0.0, timestamp - float(self.entered_at[slot, z]))
+                self.exited[z] += 1
+                self.dwell_total[z] += dwell
+                events.append({'zone': self.names[z], 'event': event, 'track_id': int(self.slot_ids[slot]),
+                               'class': int(self.slot_classes[slot]), 'timestamp': timestamp, 'dwell': dwell})
+        return events
+
+    def _completions(self, ended):
+        """Trip events for tracks that ended after visiting a zone.
+
+        'complete' (origin / destination) hanya jika track masuk zone kedua
+        yang berbeda; track yang hanya masuk satu zone (fragment, hilang di
+        tengah junction) menjadi 'incomplete' dan tidak masuk OD matrix.
+        """
+        events = []
+        for slot in np.flatnonzero(ended & (self.first_zone >= 0)).tolist():
+            event = {'event': 'complete' if self.left_origin[slot] else 'incomplete',
+                     'track_id': int(self.slot_ids[slot]), 'class': int(self.slot_classes[slot]),
+                     'timestamp': float(self.slot_last_seen[slot]), 'origin': int(self.first_zone[slot])}
+            if self.left_origin[slot]:
+                event['destination'] = int(self.last_zone[slot])
+            events.append(event)
+        self.first_zone[ended] = -1
+        self.last_zone[ended] = -1
+        self.left_origin[ended] = False
+        return events
+
+    def get_counts(self):
+        """Occupancy, enter/exit counts and mean dwell (seconds) per zone"""
+        return {
+            name: {
+                'occupancy': int(self.occupancy[z]),
+                'entered': int(self.entered[z]),
+                'exited': int(self.exited[z]),
+                'mean_dwell': float(self.dwell_total[z] / self.exited[z]) if self.exited[z] else 0.0
+            }
+            for z, name in enumerate(self.names)
+        }
+
+    def reset(self):
+        self.membership[:] = 0
+        self.first_zone[:] = -1
+        self.last_zone[:] = -1
+        self.left_origin[:] = False
+        self.slot_ids[:] = -1
+        self.occupancy[:] = 0
+        self.entered[:] = 0
+        self.exited[:] = 0
+        self.dwell_total[:] = 0
+        self._primed = False